@@ -16,14 +16,29 @@ aliases and continue to work unchanged.
 """
 
 import argparse
+import bz2
+import collections
+import contextlib
+import decimal
 import sys
 import os
 import io
 import math
+import mmap
 import random
+import re
 import hashlib
+import heapq
 import itertools
+import lzma
 import operator
+import queue
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from multiprocessing import get_context, resource_tracker, shared_memory
 
 # ── secp256k1 constants ───────────────────────────────────────────────────────
 P = 115792089237316195423570985008687907853269984665640564039457584007908834671663
@@ -46,30 +61,2059 @@ ror = lambda val, r_bits, max_bits: (
 ) | (val << (max_bits - (r_bits % max_bits)) & (2**max_bits - 1))
 
 
+def parse_size(s):
+    """Parse a byte count such as '65536', '64K', '8M' or '1G'."""
+    s = s.strip().upper().rstrip("B")
+    mult = 1
+    if s and s[-1] in "KMG":
+        mult = 1024 ** ("KMG".index(s[-1]) + 1)
+        s = s[:-1]
+    try:
+        n = int(s) * mult
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {s!r}")
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"size must be non-negative: {s!r}")
+    return n
+
+
+def fp_rate(s):
+    """Parse a false-positive rate: a float strictly between 0 and 1."""
+    try:
+        p = float(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate: {s!r}")
+    if not 0 < p < 1:
+        raise argparse.ArgumentTypeError(f"rate must be between 0 and 1: {s!r}")
+    return p
+
+
+def shift_count(s):
+    """Parse a --shift bit count: an integer from 0 to 255."""
+    try:
+        k = int(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shift: {s!r}")
+    if not 0 <= k <= 255:
+        raise argparse.ArgumentTypeError(f"shift must be between 0 and 255: {s!r}")
+    return k
+
+
+def non_negative_int(s):
+    """Parse a count that may be zero, such as --sample-pairs M."""
+    try:
+        n = int(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid count: {s!r}")
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"count must be non-negative: {s!r}")
+    return n
+
+
+# Names a --where expression can use besides y (the result) and a, b (the pair).
+_WHERE_NAMES = {
+    "__builtins__": {},
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "pow": pow,
+    "popcount": lambda x: bin(x).count("1"),
+    "N": N,
+    "P": P,
+}
+
+
+def where_predicate(expr):
+    """Compile a --where expression such as 'y > 0x27eb78574a' into where(y, a, b).
+
+    The expression is compiled once into a lambda; a and b are None outside
+    the pairwise generators.  It sits on lines of its own in the lambda, so
+    that a trailing comment cannot swallow the closing parenthesis.
+    """
+    try:
+        compile(expr, "--where", "eval")
+        code = compile(f"lambda y, a=None, b=None: (\n{expr}\n)", "--where", "eval")
+    except SyntaxError as e:
+        raise argparse.ArgumentTypeError(f"invalid expression {expr!r}: {e.msg}")
+    return eval(code, dict(_WHERE_NAMES))
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+DEFAULT_BUFFER_SIZE = 1 << 20
+RECORD_SIZE = 32  # one 256-bit value, big-endian, in --in-format/--out-format raw
+
+
+class OutputSink:
+    """Buffered output shared by every generator.
+
+    Formatted lines are appended to a bytearray and handed to the underlying
+    binary stream in chunks of at least ``buffer_size`` bytes, so a generator
+    pays one write() per chunk instead of one print() per value.  Each
+    chunk is handed over whole and never touched again, so the stream may
+    keep it.  close() writes whatever is left, and closes the stream too if
+    the sink owns it.
+    """
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, owns_stream=False):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.owns_stream = owns_stream
+        self._buf = bytearray()
+
+    def line(self, s):
+        """Write one text line."""
+        buf = self._buf
+        buf += s.encode("utf-8", "surrogateescape")
+        buf += b"\n"
+        if len(buf) >= self.buffer_size:
+            self.flush()
+
+    def value(self, i):
+        """Write one integer as a 64-char hex line (same text as hexify)."""
+        buf = self._buf
+        buf += b"%064x\n" % i
+        if len(buf) >= self.buffer_size:
+            self.flush()
+
+    def records(self, data):
+        """Write a block of 32-byte big-endian records as 64-char hex lines."""
+        if data:
+            buf = self._buf
+            buf += data.hex("\n", RECORD_SIZE).encode()
+            buf += b"\n"
+            if len(buf) >= self.buffer_size:
+                self.flush()
+
+    def encode(self, values):
+        """Return the bytes value() would write for each of values, in one piece.
+
+        Needs no state of the sink, so --jobs workers can format their own
+        results and the writing process only has to call write_encoded().
+        """
+        return b"%064x\n" * len(values) % tuple(values)
+
+    def write_encoded(self, data):
+        """Write bytes made by encode()."""
+        buf = self._buf
+        buf += data
+        if len(buf) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            self.stream.write(self._buf)
+            self._buf = bytearray()
+        self.stream.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.owns_stream:
+                self.stream.close()
+
+
+class RawOutputSink(OutputSink):
+    """OutputSink for --out-format raw: each value is a 32-byte big-endian record."""
+
+    def line(self, s):
+        sys.exit(
+            "generators.py: this generator writes text lines; "
+            "--out-format raw is not supported"
+        )
+
+    def value(self, i):
+        buf = self._buf
+        try:
+            buf += i.to_bytes(RECORD_SIZE, "big")
+        except OverflowError:
+            sys.exit(f"generators.py: value {i:#x} does not fit in a 32-byte record")
+        if len(buf) >= self.buffer_size:
+            self.flush()
+
+    def records(self, data):
+        buf = self._buf
+        buf += data
+        if len(buf) >= self.buffer_size:
+            self.flush()
+
+    def encode(self, values):
+        """Raises OverflowError for a value that does not fit in a record."""
+        return b"".join([i.to_bytes(RECORD_SIZE, "big") for i in values])
+
+
+class BackgroundWriter:
+    """Binary stream wrapper that writes (and optionally compresses) on a thread.
+
+    write() puts the buffer on a bounded queue and returns at once; a worker
+    thread compresses it with *compressor* (anything with compress() and
+    flush(), such as zlib.compressobj) and writes the result to *stream*.
+    The caller only blocks when the worker is ``depth`` buffers behind.
+    Errors raised on the worker, e.g. BrokenPipeError, are re-raised by the
+    next write() or by close().
+    """
+
+    def __init__(self, stream, compressor=None, depth=4, close_stream=False):
+        self.stream = stream
+        self.compressor = compressor
+        self.close_stream = close_stream
+        self._queue = queue.Queue(depth)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(data)
+
+    def flush(self):
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self.close_stream:
+            self.stream.close()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        get = self._queue.get
+        try:
+            compressor = self.compressor
+            while (data := get()) is not None:
+                if compressor is not None:
+                    data = compressor.compress(data)
+                if data:
+                    self.stream.write(data)
+            if compressor is not None:
+                self.stream.write(compressor.flush())
+            self.stream.flush()
+        except BaseException as e:
+            self._error = e
+            # Keep draining so the producer never blocks on a full queue.
+            while get() is not None:
+                pass
+
+
+class FilteredSink:
+    """Pass on only the values for which where(value) is true (--where).
+
+    The test runs on the int, before any formatting, so a dropped value
+    costs one call.  Text lines cannot be filtered.
+    """
+
+    def __init__(self, sink, where):
+        self.sink = sink
+        self.where = where
+
+    def line(self, s):
+        sys.exit("generators.py: this generator writes text lines; --where is not supported")
+
+    def value(self, i):
+        try:
+            keep = self.where(i)
+        except Exception as e:
+            sys.exit(f"generators.py: --where failed on {i:#x}: {e!r}")
+        if keep:
+            self.sink.value(i)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
+
+
+class BloomFilter:
+    """Set of byte strings in a fixed bit array, with false positives.
+
+    Each key sets nhashes bits, chosen by double hashing from one 128-bit
+    BLAKE2b digest.  for_rate() sizes the filter from a memory cap and a
+    target false-positive rate; that rate holds up to capacity keys and
+    grows beyond it.  save() and load() keep the filter in a file, so a
+    later run can go on from it.
+    """
+
+    _MAGIC = b"GENBLOOM"
+    _HEADER = struct.Struct("<8sQQQ")  # magic, nbits, nhashes, count
+
+    def __init__(self, nbits, nhashes, bits=None, count=0):
+        self.nbits = nbits
+        self.nhashes = nhashes
+        self.bits = bytearray((nbits + 7) // 8) if bits is None else bits
+        self.count = count  # keys added (not counting apparent duplicates)
+
+    @classmethod
+    def for_rate(cls, fp_rate, mem):
+        """A filter of mem bytes, with the hash count that is best for fp_rate."""
+        return cls(max(mem, 1) * 8, max(1, round(-math.log2(fp_rate))))
+
+    def capacity(self, fp_rate):
+        """How many keys the filter holds before its false-positive rate exceeds fp_rate."""
+        return int(self.nbits * math.log(2) ** 2 / -math.log(fp_rate))
+
+    def add(self, key):
+        """Add key; return True if it was (probably) already there."""
+        h = int.from_bytes(hashlib.blake2b(key, digest_size=16).digest(), "little")
+        h1 = h & 0xFFFFFFFFFFFFFFFF
+        h2 = h >> 64 | 1
+        bits = self.bits
+        nbits = self.nbits
+        seen = True
+        for k in range(self.nhashes):
+            pos = (h1 + k * h2) % nbits
+            byte = bits[pos >> 3]
+            mask = 1 << (pos & 7)
+            if not byte & mask:
+                bits[pos >> 3] = byte | mask
+                seen = False
+        if not seen:
+            self.count += 1
+        return seen
+
+    @classmethod
+    def load(cls, path):
+        """Read a filter written by save()."""
+        with open(path, "rb") as fp:
+            magic, nbits, nhashes, count = cls._HEADER.unpack(fp.read(cls._HEADER.size))
+            bits = bytearray(fp.read())
+        if magic != cls._MAGIC or len(bits) != (nbits + 7) // 8:
+            raise ValueError(f"{path} is not a dedup state file")
+        return cls(nbits, nhashes, bits, count)
+
+    def save(self, path):
+        """Write the filter to path, replacing it only once the new copy is complete."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fp:
+            fp.write(self._HEADER.pack(self._MAGIC, self.nbits, self.nhashes, self.count))
+            fp.write(self.bits)
+        os.replace(tmp, path)
+
+
+class DedupSink:
+    """Pass on only outputs not seen before, as far as a BloomFilter can tell (--dedup).
+
+    Values are keyed by their 32-byte record, text lines by their UTF-8
+    bytes.  A false positive drops a value that is in fact new.  With
+    state, the filter is loaded from that file if it exists and written
+    back on close, so values written by earlier runs are dropped too.
+    """
+
+    def __init__(self, sink, bloom, fp_rate, state=None):
+        self.sink = sink
+        self.bloom = bloom
+        self.fp_rate = fp_rate
+        self.state = state
+
+    def line(self, s):
+        if not self.bloom.add(s.encode("utf-8", "surrogateescape")):
+            self.sink.line(s)
+
+    def value(self, i):
+        try:
+            key = i.to_bytes(RECORD_SIZE, "big")
+        except OverflowError:
+            key = i.to_bytes(i.bit_length() // 8 + 1, "big", signed=True)
+        if not self.bloom.add(key):
+            self.sink.value(i)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        try:
+            bloom = self.bloom
+            capacity = bloom.capacity(self.fp_rate)
+            if bloom.count > capacity:
+                print(
+                    f"generators.py: --dedup filter holds {bloom.count} values but was sized "
+                    f"for {capacity}; false positives are now above {self.fp_rate:g} "
+                    f"(raise --dedup-mem)",
+                    file=sys.stderr,
+                )
+            if self.state is not None:
+                bloom.save(self.state)
+        finally:
+            self.sink.close()
+
+
+class ShardedSink:
+    """Spread output over several sinks, one per shard file.
+
+    hash: a value goes to shard ``crc32(record) % K``, record being its
+    32-byte big-endian form, and a text line to ``crc32(line) % K``, so equal
+    outputs always land in the same shard.
+    roundrobin: outputs are dealt to the shards in turn.
+    """
+
+    def __init__(self, shards, by="hash"):
+        self.shards = shards
+        self.by = by
+        self._next = 0
+
+    def _pick(self):
+        k = self._next
+        self._next = (k + 1) % len(self.shards)
+        return self.shards[k]
+
+    def line(self, s):
+        if self.by == "hash":
+            key = zlib.crc32(s.encode("utf-8", "surrogateescape"))
+            self.shards[key % len(self.shards)].line(s)
+        else:
+            self._pick().line(s)
+
+    def value(self, i):
+        if self.by == "hash":
+            try:
+                record = i.to_bytes(RECORD_SIZE, "big")
+            except OverflowError:
+                # Negative or wider than 256 bits: any stable encoding will do.
+                record = i.to_bytes(i.bit_length() // 8 + 1, "big", signed=True)
+            self.shards[zlib.crc32(record) % len(self.shards)].value(i)
+        else:
+            self._pick().value(i)
+
+    def flush(self):
+        for shard in self.shards:
+            shard.flush()
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+# name -> (compressor factory, default level, file extension, valid levels)
+COMPRESSORS = {
+    "gzip": (lambda level: zlib.compressobj(level, zlib.DEFLATED, 31), 6, ".gz", range(0, 10)),
+    "bz2": (lambda level: bz2.BZ2Compressor(level), 9, ".bz2", range(1, 10)),
+    "lzma": (lambda level: lzma.LZMACompressor(preset=level), 6, ".xz", range(0, 10)),
+}
+
+
+def _compressor(args):
+    """Return a new compressor for --compress/--compress-level, or None."""
+    if args.compress is None:
+        return None
+    factory, level, _, levels = COMPRESSORS[args.compress]
+    if args.compress_level is not None:
+        level = args.compress_level
+        if level not in levels:
+            sys.exit(
+                f"generators.py: --compress-level for {args.compress} must be "
+                f"between {levels[0]} and {levels[-1]}"
+            )
+    return factory(level)
+
+
+def open_sink(args):
+    """Build the output sink described by the common output options."""
+    sink = _open_sink(args)
+    if args.dedup or args.func is run_dedup:
+        sink = _dedup_sink(args, sink)
+    if args.where is not None:
+        sink = FilteredSink(sink, args.where)
+    return sink
+
+
+def _dedup_sink(args, sink):
+    """Wrap sink in a DedupSink, resuming from --dedup-state if that file exists."""
+    state = args.dedup_state
+    if state is not None and os.path.exists(state):
+        try:
+            bloom = BloomFilter.load(state)
+        except (OSError, ValueError, struct.error) as e:
+            sys.exit(f"generators.py: cannot load --dedup-state: {e}")
+    else:
+        bloom = BloomFilter.for_rate(args.dedup_fp_rate, args.dedup_mem)
+    return DedupSink(sink, bloom, args.dedup_fp_rate, state)
+
+
+def _open_sink(args):
+    buffer_size = args.buffer_size
+    if buffer_size is None:
+        # Keep interactive output line-by-line; batch everything else.
+        buffer_size = 0 if sys.stdout.isatty() else DEFAULT_BUFFER_SIZE
+    cls = RawOutputSink if args.out_format == "raw" else OutputSink
+
+    if args.shm_out is not None:
+        if args.shard_out is not None or args.compress is not None:
+            sys.exit("generators.py: --shm-out cannot be combined with --shard-out or --compress")
+        if args.shm_slots < 1:
+            sys.exit("generators.py: --shm-slots must be at least 1")
+        stream = RingWriter(args.shm_out, args.shm_slots)
+        if args.io_threads:
+            stream = BackgroundWriter(stream, close_stream=True)
+        return RawOutputSink(stream, buffer_size or RECORD_SIZE, owns_stream=True)
+
+    if args.shard_out is not None:
+        if args.shards < 1:
+            sys.exit("generators.py: --shards must be at least 1")
+        os.makedirs(args.shard_out, exist_ok=True)
+        ext = ".bin" if args.out_format == "raw" else ".txt"
+        if args.compress is not None:
+            ext += COMPRESSORS[args.compress][2]
+        shards = []
+        for k in range(args.shards):
+            compressor = _compressor(args)  # before a bad level leaves a file behind
+            fp = open(os.path.join(args.shard_out, f"part-{k:05d}{ext}"), "wb", buffering=0)
+            if args.compress is not None or args.io_threads:
+                fp = BackgroundWriter(fp, compressor, close_stream=True)
+            shards.append(cls(fp, buffer_size, owns_stream=True))
+        return ShardedSink(shards, args.shard_by)
+
+    if args.compress is not None or args.io_threads:
+        stream = BackgroundWriter(sys.stdout.buffer, _compressor(args))
+        return cls(stream, buffer_size, owns_stream=True)
+    return cls(sys.stdout.buffer, buffer_size)
+
+
+# ── Input ─────────────────────────────────────────────────────────────────────
+READ_CHUNK = 1 << 20
+
+# A line that int(line, 16) accepts once "0x" and "L" have been stripped.
+_HEX_LINE = re.compile(rb"\s*[+-]?(?:0[xX]_?)?[0-9a-fA-F]+(?:_[0-9a-fA-F]+)*\s*")
+
+
+def read_values(args, path=None):
+    """Yield the 256-bit values on stdin (or --input), in the --in-format format."""
+    for batch in read_batches(args, path):
+        yield from batch
+
+
+def read_batches(args, path=None):
+    """Yield the input values as lists, one list per chunk of input.
+
+    Reads --input PATH (or path, if given) through a memory map when given,
+    stdin otherwise.  Malformed lines and trailing partial records are
+    reported on stderr once the input has been consumed.
+    """
+    source = open_input(args, path)
+    try:
+        yield from source.batches()
+    finally:
+        source.close()
+    source.report(args.generator)
+
+
+def read_lines(args):
+    """Yield the text lines on stdin (or --input) without their line endings (LF or CRLF)."""
+    with _text_input(args) as read:
+        yield from _split_lines(read)
+
+
+def _split_lines(read):
+    for block in _line_blocks(read):
+        text = block.decode("utf-8", "surrogateescape")
+        lines = text.split("\n")
+        if "\r" in text:
+            lines = [l[:-1] if l[-1:] == "\r" else l for l in lines]
+        yield from lines
+
+
+def read_hex_lines(args, keep):
+    """Like read_values(), but only for hex lines where keep(line) is true.
+
+    line is the text with "0x" and "L" removed, as the original loops of a
+    few generators saw it before filtering on its length.  Raw records have
+    no text, so with --in-format raw or --shm-in every value is kept.
+    """
+    if args.in_format == "raw" or args.shm_in is not None:
+        yield from read_values(args)
+        return
+    rejected = 0
+    for line in read_lines(args):
+        line = line.replace("0x", "").replace("L", "")
+        if keep(line):
+            try:
+                yield int(line, 16)
+            except ValueError:
+                rejected += 1
+    if rejected:
+        print(f"{args.generator}: rejected {rejected} malformed input line(s)", file=sys.stderr)
+
+
+def open_input(args, path=None):
+    """Return the input source selected by --input / --shm-in / --in-format.
+
+    A path given here overrides --input; "-" means stdin.
+    """
+    path = args.input if path is None else path
+    if path == "-":
+        return StreamInput(_stdin_reader(args), args.in_format)
+    if path is not None:
+        if args.cache_dir is not None and args.in_format == "hex":
+            return open_cached_input(path, args.cache_dir)
+        return MappedInput(path, args.in_format)
+    if args.shm_in is not None:
+        return RingInput(args.shm_in)
+    return StreamInput(_stdin_reader(args), args.in_format)
+
+
+@contextlib.contextmanager
+def _text_input(args):
+    """Provide a read(n) function for the text on --input PATH, or stdin.
+
+    For generators that read lines rather than values.  These have no use
+    for raw records, so --in-format raw and --shm-in are refused.
+    """
+    if args.in_format == "raw" or args.shm_in is not None:
+        sys.exit(
+            f"generators.py: {args.generator} reads text lines; "
+            "--in-format raw and --shm-in are not supported"
+        )
+    if args.input is None or args.input == "-":
+        yield _stdin_reader(args)
+        return
+    with open(args.input, "rb") as fp:
+        read = fp.read1
+        if args.io_threads:
+            read = ReadAhead(read).read
+        yield read
+
+
+def _stdin_reader(args):
+    """Return a read(n) function for stdin, read ahead on a thread with --io-threads."""
+    read = sys.stdin.buffer.read1
+    if args.io_threads:
+        read = ReadAhead(read).read
+    return read
+
+
+class ReadAhead:
+    """Double-buffered reader: a thread fetches the next chunk while the last is parsed.
+
+    read() returns the chunk the thread has already fetched (its size
+    argument is ignored; chunks are READ_CHUNK bytes at most) and lets the
+    thread start on the one after.  Errors on the thread are re-raised by
+    read().
+    """
+
+    def __init__(self, read, depth=1):
+        self._read = read
+        self._queue = queue.Queue(depth)
+        self._done = False
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def read(self, n=-1):
+        if self._done:
+            return b""
+        chunk = self._queue.get()
+        if isinstance(chunk, BaseException):
+            self._done = True
+            raise chunk
+        if not chunk:
+            self._done = True
+        return chunk
+
+    def _run(self):
+        put = self._queue.put
+        try:
+            while True:
+                chunk = self._read(READ_CHUNK)
+                put(chunk)
+                if not chunk:
+                    break
+        except BaseException as e:
+            put(e)
+
+
+class _InputSource:
+    """Shared bookkeeping for the input sources below."""
+
+    def __init__(self, fmt):
+        self.format = fmt
+        self.rejected = 0  # malformed hex lines dropped
+        self.trailing = 0  # bytes left over after the last whole raw record
+
+    def report(self, name):
+        if self.rejected:
+            print(
+                f"{name}: rejected {self.rejected} malformed input line(s)",
+                file=sys.stderr,
+            )
+        if self.trailing:
+            print(
+                f"{name}: ignoring {self.trailing} trailing bytes "
+                "(incomplete 32-byte record)",
+                file=sys.stderr,
+            )
+
+    def close(self):
+        pass
+
+
+class StreamInput(_InputSource):
+    """Values read from a binary stream in large chunks.
+
+    hex: one value per line.  "0x" prefixes and Python 2 "L" suffixes are
+    stripped once per chunk and the whole chunk is parsed in one pass.  Blank
+    lines are ignored; malformed lines are dropped and counted.
+    raw: consecutive 32-byte big-endian records.
+    """
+
+    def __init__(self, read, fmt):
+        super().__init__(fmt)
+        self.read = read
+
+    def batches(self):
+        if self.format == "raw":
+            self.trailing = yield from _record_batches(self.read)
+            return
+        for block in _line_blocks(self.read):
+            values, bad = _parse_hex_block(block)
+            self.rejected += bad
+            if values:
+                yield values
+
+
+class RingInput(StreamInput):
+    """Raw records read from a shared-memory ring (--shm-in)."""
+
+    def __init__(self, name):
+        self.ring = RingReader(name)
+        super().__init__(self.ring.read, "raw")
+
+    def close(self):
+        self.ring.close()
+
+
+class MappedInput(_InputSource):
+    """Values read from a memory-mapped file, in the same formats as StreamInput.
+
+    The file is never read into memory as a whole: hex lines are parsed one
+    window at a time and raw records are converted straight off a memoryview
+    of the map.  Values start *offset* bytes into the file.
+    """
+
+    def __init__(self, path, fmt, offset=0):
+        super().__init__(fmt)
+        self.offset = offset
+        with open(path, "rb") as fp:
+            self.size = os.fstat(fp.fileno()).st_size
+            # mmap() refuses empty files; there is nothing to map anyway.
+            self.map = (
+                mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                if self.size
+                else b""
+            )
+        if self.size and hasattr(self.map, "madvise"):
+            self.map.madvise(mmap.MADV_SEQUENTIAL)
+
+    def batches(self):
+        start, stop = self.offset, self.size
+        if self.format == "raw":
+            yield from self._record_batches(start, stop)
+            return
+        mm = self.map
+        pos = start
+        while pos < stop:
+            cut = mm.rfind(b"\n", pos, min(pos + READ_CHUNK, stop))
+            if cut < 0:
+                # A single line longer than the window: take it whole.
+                cut = mm.find(b"\n", pos, stop)
+                if cut < 0:
+                    cut = stop
+            values, bad = _parse_hex_block(mm[pos:cut])
+            self.rejected += bad
+            if values:
+                yield values
+            pos = cut + 1
+
+    def _record_batches(self, start, stop):
+        end = stop - (stop - start) % RECORD_SIZE
+        self.trailing += stop - end
+        from_bytes = int.from_bytes
+        step = READ_CHUNK - READ_CHUNK % RECORD_SIZE
+        with memoryview(self.map) as mv:
+            for lo in range(start, end, step):
+                hi = min(lo + step, end)
+                yield [
+                    from_bytes(mv[off : off + RECORD_SIZE], "big")
+                    for off in range(lo, hi, RECORD_SIZE)
+                ]
+
+    def close(self):
+        if self.size:
+            self.map.close()
+
+
+def _line_blocks(read):
+    """Yield runs of complete lines (final newline removed) from read(n)."""
+    tail = b""
+    while True:
+        chunk = read(READ_CHUNK)
+        if not chunk:
+            break
+        if tail:
+            chunk = tail + chunk
+        cut = chunk.rfind(b"\n")
+        if cut < 0:
+            tail = chunk
+            continue
+        yield chunk[:cut]
+        tail = chunk[cut + 1 :]
+    if tail:
+        yield tail
+
+
+def _parse_hex_block(block):
+    """Parse a run of hex lines; return (values, number of rejected lines)."""
+    lines = block.replace(b"0x", b"").replace(b"L", b"").split(b"\n")
+    try:
+        return [int(line, 16) for line in lines], 0
+    except ValueError:
+        pass
+    # Slow path, only for blocks holding a blank or malformed line.
+    match = _HEX_LINE.fullmatch
+    values = [int(line, 16) for line in lines if match(line)]
+    blank = sum(1 for line in lines if not line.strip())
+    return values, len(lines) - len(values) - blank
+
+
+def _record_batches(read):
+    """Yield lists of ints from 32-byte big-endian records; return the leftover byte count."""
+    from_bytes = int.from_bytes
+    tail = b""
+    while True:
+        chunk = read(READ_CHUNK)
+        if not chunk:
+            break
+        if tail:
+            chunk = tail + chunk
+        end = len(chunk) - len(chunk) % RECORD_SIZE
+        if end:
+            mv = memoryview(chunk)
+            yield [
+                from_bytes(mv[off : off + RECORD_SIZE], "big")
+                for off in range(0, end, RECORD_SIZE)
+            ]
+        tail = chunk[end:]
+    return len(tail)
+
+
+# ── Parsed-input cache ────────────────────────────────────────────────────────
+# --cache-dir keeps each parsed hex --input file as DIR/<blake2b of content>.u256:
+# a header (magic, content digest, source size and mtime, rejected line
+# count) followed by the values as 32-byte records.
+_CACHE_MAGIC = b"U256CACHE\x001\0\0\0\0\0"
+_CACHE_HEADER = struct.Struct("<16s32sQQQ24x")  # 96 bytes, a whole number of records
+
+
+def _file_digest(path):
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as fp:
+        while chunk := fp.read(READ_CHUNK):
+            h.update(chunk)
+    return h.digest()
+
+
+def open_cached_input(path, cache_dir):
+    """Return a source for hex file *path* that reads or builds its .u256 cache.
+
+    The cache is used only if its digest, size and mtime all match the
+    source; otherwise the source is parsed and the cache rewritten.
+    """
+    st = os.stat(path)
+    digest = _file_digest(path)
+    cache = os.path.join(cache_dir, digest.hex() + ".u256")
+    try:
+        with open(cache, "rb") as fp:
+            header = _CACHE_HEADER.unpack(fp.read(_CACHE_HEADER.size))
+    except (OSError, struct.error):
+        header = None
+    if header is not None and header[:4] == (
+        _CACHE_MAGIC,
+        digest,
+        st.st_size,
+        st.st_mtime_ns,
+    ):
+        source = MappedInput(cache, "raw", offset=_CACHE_HEADER.size)
+        source.rejected = header[4]
+        return source
+    os.makedirs(cache_dir, exist_ok=True)
+    return CachingInput(path, cache, digest, st)
+
+
+class CachingInput(MappedInput):
+    """A hex --input file that writes its .u256 cache while it is parsed.
+
+    The cache is only committed after a complete scan; values that do not
+    fit in 32 bytes, or a scan cut short, leave no cache behind.
+    """
+
+    def __init__(self, path, cache, digest, st):
+        super().__init__(path, "hex")
+        self.cache = cache
+        self.digest = digest
+        self.stat = st
+
+    def batches(self):
+        tmp = f"{self.cache}.{os.getpid()}.tmp"
+        fp = open(tmp, "wb")
+        fp.write(bytes(_CACHE_HEADER.size))
+        ok = committed = False
+        try:
+            ok = True
+            for values in super().batches():
+                if ok:
+                    try:
+                        fp.write(b"".join([v.to_bytes(RECORD_SIZE, "big") for v in values]))
+                    except OverflowError:
+                        ok = False
+                yield values
+            if ok:
+                fp.seek(0)
+                fp.write(
+                    _CACHE_HEADER.pack(
+                        _CACHE_MAGIC,
+                        self.digest,
+                        self.stat.st_size,
+                        self.stat.st_mtime_ns,
+                        self.rejected,
+                    )
+                )
+                fp.close()
+                os.replace(tmp, self.cache)
+                committed = True
+        finally:
+            fp.close()
+            if not committed:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+
+
+# ── Shared-memory transport ───────────────────────────────────────────────────
+# A single-producer / single-consumer ring of 32-byte records in a
+# multiprocessing.shared_memory block, used by --shm-out / --shm-in to chain
+# two generators.py processes without a pipe.  Header fields are u64s:
+# magic, slot count, records written, records read, producer done, consumer gone.
+_RING_MAGIC = int.from_bytes(b"U256RING", "big")
+_RING_HEADER = struct.Struct("<6Q")
+_RING_WAIT = 0.05  # longest sleep while the ring is full or empty, in seconds
+
+
+class _Ring:
+    def __init__(self, shm):
+        self.shm = shm
+        self.buf = shm.buf
+        self.slots = _RING_HEADER.unpack_from(self.buf)[1]
+        self.data = self.buf[_RING_HEADER.size :]
+
+    def _get(self, field):
+        return struct.unpack_from("<Q", self.buf, field * 8)[0]
+
+    def _set(self, field, value):
+        struct.pack_into("<Q", self.buf, field * 8, value)
+
+    def _close(self):
+        self.data.release()
+        self.buf = self.data = None
+        self.shm.close()
+
+
+class RingWriter(_Ring):
+    """Producer end of a shared-memory ring; a binary stream of whole records.
+
+    write() copies records into free slots and then publishes them by
+    advancing the write cursor, so a full batch costs one cursor update
+    rather than a syscall per value.  close() marks the stream finished,
+    waits for the consumer to drain it and removes the segment.
+    """
+
+    def __init__(self, name, slots):
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_RING_HEADER.size + slots * RECORD_SIZE
+        )
+        _RING_HEADER.pack_into(shm.buf, 0, _RING_MAGIC, slots, 0, 0, 0, 0)
+        super().__init__(shm)
+
+    def write(self, data):
+        data = memoryview(data)
+        slots, head = self.slots, self._get(2)
+        pos, wait = 0, 0.0
+        while pos < len(data):
+            if self._get(5):
+                raise BrokenPipeError(f"shared-memory consumer of {self.shm.name} exited")
+            free = slots - (head - self._get(3))
+            if not free:
+                wait = min(wait * 2 or 1e-5, _RING_WAIT)
+                time.sleep(wait)
+                continue
+            wait = 0.0
+            slot = head % slots
+            n = min(free, slots - slot, (len(data) - pos) // RECORD_SIZE)
+            lo = slot * RECORD_SIZE
+            self.data[lo : lo + n * RECORD_SIZE] = data[pos : pos + n * RECORD_SIZE]
+            pos += n * RECORD_SIZE
+            head += n
+            self._set(2, head)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._set(4, 1)
+        wait = 0.0
+        while self._get(3) < self._get(2) and not self._get(5):
+            wait = min(wait * 2 or 1e-5, _RING_WAIT)
+            time.sleep(wait)
+        shm = self.shm
+        self._close()
+        shm.unlink()
+
+
+class RingReader(_Ring):
+    """Consumer end of a shared-memory ring, with a read(n) like a binary stream.
+
+    Waits up to *timeout* seconds for the producer to create the segment.
+    """
+
+    def __init__(self, name, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+                break
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    sys.exit(f"generators.py: no shared-memory ring named {name!r}")
+                time.sleep(_RING_WAIT)
+        try:
+            # Only the producer may unlink the segment (Python < 3.13 would
+            # otherwise unlink it when this process exits).
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        super().__init__(shm)
+        if _RING_HEADER.unpack_from(self.buf)[0] != _RING_MAGIC or self.slots < 1:
+            sys.exit(f"generators.py: {name!r} is not a generators.py ring")
+
+    def read(self, n=READ_CHUNK):
+        slots, tail = self.slots, self._get(3)
+        wait = 0.0
+        while True:
+            done = self._get(4)
+            avail = self._get(2) - tail
+            if avail:
+                break
+            if done:
+                return b""
+            wait = min(wait * 2 or 1e-5, _RING_WAIT)
+            time.sleep(wait)
+        slot = tail % slots
+        k = min(avail, slots - slot, max(n // RECORD_SIZE, 1))
+        lo = slot * RECORD_SIZE
+        chunk = bytes(self.data[lo : lo + k * RECORD_SIZE])
+        self._set(3, tail + k)
+        return chunk
+
+    def close(self):
+        self._set(5, 1)
+        self._close()
+
+
+# ── Value store ───────────────────────────────────────────────────────────────
+STORE_TILE = 4096  # values converted to ints at a time when walking a U256Store
+
+
+class U256Store:
+    """A sequence of 256-bit values packed as 32-byte big-endian records.
+
+    The values live in one contiguous buffer, a bytearray or any read-only
+    buffer such as an mmap of a record file, at 32 bytes each against about
+    100 for a list of ints.  Indexing returns an int and slicing a list of
+    ints, so a block of values is converted in one go when it is needed;
+    iteration converts STORE_TILE values at a time.  Values must fit in
+    32 bytes.
+    """
+
+    def __init__(self, buf=None):
+        self.buf = bytearray() if buf is None else buf
+
+    def __len__(self):
+        return len(self.buf) // RECORD_SIZE
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            lo, hi, step = k.indices(len(self))
+            if step != 1:
+                raise ValueError("U256Store slices must be contiguous")
+            from_bytes = int.from_bytes
+            with memoryview(self.buf) as mv:
+                return [
+                    from_bytes(mv[off : off + RECORD_SIZE], "big")
+                    for off in range(lo * RECORD_SIZE, hi * RECORD_SIZE, RECORD_SIZE)
+                ]
+        off = self._offset(k)
+        return int.from_bytes(self.buf[off : off + RECORD_SIZE], "big")
+
+    def __setitem__(self, k, v):
+        off = self._offset(k)
+        self.buf[off : off + RECORD_SIZE] = v.to_bytes(RECORD_SIZE, "big")
+
+    def __delitem__(self, k):
+        lo, hi, step = k.indices(len(self))
+        if step != 1:
+            raise ValueError("U256Store slices must be contiguous")
+        del self.buf[lo * RECORD_SIZE : max(hi, lo) * RECORD_SIZE]
+
+    def __iter__(self):
+        for lo in range(0, len(self), STORE_TILE):
+            yield from self[lo : lo + STORE_TILE]
+
+    def _offset(self, k):
+        n = len(self)
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError("U256Store index out of range")
+        return k * RECORD_SIZE
+
+    def append(self, v):
+        self.buf += v.to_bytes(RECORD_SIZE, "big")
+
+
+def load_store(values):
+    """Read values into a U256Store, or into a list if one does not fit in 32 bytes."""
+    store = U256Store()
+    buf = store.buf
+    values = iter(values)
+    for v in values:
+        try:
+            buf += v.to_bytes(RECORD_SIZE, "big")
+        except OverflowError:
+            data = store[:]
+            data.append(v)
+            data += values
+            return data
+    return store
+
+
+_np = None  # numpy once _numpy() has tried to import it (False: not installed)
+
+
+def _numpy():
+    """Return the numpy module, or None if it is not installed.
+
+    numpy is optional and only imported the first time a vectorized path
+    asks for it, so generators that never use it do not pay for the import.
+    """
+    global _np
+    if _np is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _np = numpy
+    return _np or None
+
+
+class U256Array:
+    """A block of 256-bit values as an (n, 4) numpy uint64 array of limbs.
+
+    Limb 0 is the most significant, as in a 32-byte big-endian record, so
+    records convert with a byte swap.  Bitwise operators, shifts (masked to
+    256 bits) and comparisons work on whole blocks, with an int or another
+    U256Array of the same length as the other operand; comparisons return
+    numpy bool arrays.  from_ints() and _as_limbs() raise OverflowError for
+    values that are negative or wider than 256 bits, so callers can fall back
+    to plain ints.  Needs numpy (see _numpy()).
+    """
+
+    __slots__ = ("limbs",)
+
+    def __init__(self, limbs):
+        self.limbs = limbs
+
+    @classmethod
+    def from_records(cls, buf):
+        np = _numpy()
+        return cls(np.frombuffer(buf, dtype=">u8").reshape(-1, 4).astype(np.uint64))
+
+    def to_records(self):
+        return self.limbs.astype(">u8").tobytes()
+
+    @classmethod
+    def from_ints(cls, values):
+        return cls.from_records(b"".join([v.to_bytes(RECORD_SIZE, "big") for v in values]))
+
+    def to_ints(self):
+        buf = self.to_records()
+        from_bytes = int.from_bytes
+        return [from_bytes(buf[off : off + RECORD_SIZE], "big") for off in range(0, len(buf), RECORD_SIZE)]
+
+    @classmethod
+    def from_hex(cls, lines):
+        """From hex strings without "0x", as written by to_hex()."""
+        lines = list(lines)
+        text = "".join([s.zfill(64) for s in lines])
+        if len(text) != 64 * len(lines):
+            raise OverflowError("hex value wider than 256 bits")
+        return cls.from_records(bytes.fromhex(text))
+
+    def to_hex(self):
+        """Return the values as 64-char lowercase hex strings."""
+        return self.to_records().hex("\n", RECORD_SIZE).split("\n") if len(self) else []
+
+    def __len__(self):
+        return len(self.limbs)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return U256Array(self.limbs[k])
+        return int.from_bytes(self.limbs[k].astype(">u8").tobytes(), "big")
+
+    def __and__(self, other):
+        return U256Array(self.limbs & _as_limbs(other))
+
+    def __or__(self, other):
+        return U256Array(self.limbs | _as_limbs(other))
+
+    def __xor__(self, other):
+        return U256Array(self.limbs ^ _as_limbs(other))
+
+    __rand__, __ror__, __rxor__ = __and__, __or__, __xor__
+
+    def __invert__(self):
+        return U256Array(~self.limbs)
+
+    def __lshift__(self, k):
+        if k < 0:
+            raise ValueError("negative shift count")
+        np = _numpy()
+        x = self.limbs
+        out = np.zeros_like(x)
+        q, r = divmod(k, 64)
+        if q < 4:
+            if r:
+                out[:, : 4 - q] = x[:, q:] << np.uint64(r)
+                out[:, : 3 - q] |= x[:, q + 1 :] >> np.uint64(64 - r)
+            else:
+                out[:, : 4 - q] = x[:, q:]
+        return U256Array(out)
+
+    def __rshift__(self, k):
+        if k < 0:
+            raise ValueError("negative shift count")
+        np = _numpy()
+        x = self.limbs
+        out = np.zeros_like(x)
+        q, r = divmod(k, 64)
+        if q < 4:
+            if r:
+                out[:, q:] = x[:, : 4 - q] >> np.uint64(r)
+                out[:, q + 1 :] |= x[:, : 3 - q] << np.uint64(64 - r)
+            else:
+                out[:, q:] = x[:, : 4 - q]
+        return U256Array(out)
+
+    def _compare(self, other):
+        """Return (self < other, self == other) as bool arrays."""
+        np = _numpy()
+        a = self.limbs
+        b = _as_limbs(other)
+        lt = np.zeros(len(a), dtype=bool)
+        eq = np.ones(len(a), dtype=bool)
+        for i in range(4):  # most significant limb first
+            x = a[:, i]
+            y = b[..., i]
+            lt |= eq & (x < y)
+            eq &= x == y
+        return lt, eq
+
+    def __lt__(self, other):
+        return self._compare(other)[0]
+
+    def __le__(self, other):
+        lt, eq = self._compare(other)
+        return lt | eq
+
+    def __gt__(self, other):
+        lt, eq = self._compare(other)
+        return ~(lt | eq)
+
+    def __ge__(self, other):
+        return ~self._compare(other)[0]
+
+    def __eq__(self, other):
+        return self._compare(other)[1]
+
+    def __ne__(self, other):
+        return ~self._compare(other)[1]
+
+    __hash__ = None
+
+    def popcount(self):
+        """Return the number of set bits of each value."""
+        np = _numpy()
+        count = getattr(np, "bitwise_count", None)  # numpy 2.0+
+        if count is not None:
+            return count(self.limbs).sum(axis=1)
+        return np.unpackbits(np.ascontiguousarray(self.limbs).view(np.uint8), axis=1).sum(axis=1)
+
+    def rsub(self, x):
+        """Return x - self mod 2**256, for an int x."""
+        return U256Array(_sub_limbs(_as_limbs(x), self.limbs)[0])
+
+    def reduce(self, n):
+        """Return self mod n, for values below 2n: n is subtracted where self >= n."""
+        np = _numpy()
+        diff, borrow = _sub_limbs(self.limbs, _as_limbs(n))
+        return U256Array(np.where(borrow[:, None], self.limbs, diff))
+
+
+def _as_limbs(x):
+    """The limbs of a U256Array, or of an int as a (4,) array that broadcasts."""
+    if isinstance(x, U256Array):
+        return x.limbs
+    np = _numpy()
+    return np.frombuffer(x.to_bytes(RECORD_SIZE, "big"), dtype=">u8").astype(np.uint64)
+
+
+def _add_limbs(a, b):
+    """Return a + b mod 2**256 for limb arrays that broadcast together."""
+    np = _numpy()
+    carry = np.zeros(np.broadcast(a[..., 0], b[..., 0]).shape, dtype=bool)
+    total = [None] * 4
+    for i in (3, 2, 1, 0):  # least significant limb first
+        t = a[..., i] + b[..., i]
+        total[i] = t + carry.astype(np.uint64)
+        carry = (t < a[..., i]) | (carry & (total[i] == 0))
+    return np.stack(total, axis=-1)
+
+
+def _sub_limbs(a, b):
+    """Return (a - b mod 2**256, a < b) for limb arrays that broadcast together."""
+    np = _numpy()
+    borrow = np.zeros(np.broadcast(a[..., 0], b[..., 0]).shape, dtype=bool)
+    diff = [None] * 4
+    for i in (3, 2, 1, 0):  # least significant limb first
+        x = a[..., i]
+        y = b[..., i]
+        diff[i] = x - y - borrow.astype(np.uint64)
+        borrow = (x < y) | ((x == y) & borrow)
+    return np.stack(diff, axis=-1), borrow
+
+
+def _records_hook(kernel):
+    """Return a records hook for PairWalk.tile() built on a U256Array kernel.
+
+    kernel(a, block) gives the results of a paired with each value of the
+    U256Array block as an (m, r, 4) limb array, up to r per pair in op's
+    order, and an (m, r) bool mask of those that are written (None: all of
+    them).  The hook converts each column tile to a U256Array once, and
+    returns None, so that op is used instead, when a value does not fit in
+    32 bytes.  Without numpy there is no hook: returns None.
+    """
+    np = _numpy()
+    if np is None:
+        return None
+    last = [None, None]  # the last column tile and its U256Array (None: does not fit)
+
+    def records(a, cols, start, stop, twice):
+        if last[0] is not cols:
+            try:
+                last[:] = cols, U256Array.from_ints(cols)
+            except OverflowError:
+                last[:] = cols, None
+        if last[1] is None or not 0 <= a < 1 << 256:
+            return None
+        limbs, keep = kernel(a, last[1][start:stop])
+        limbs = limbs.reshape(-1, 4) if keep is None else limbs[keep]
+        if twice:
+            limbs = np.repeat(limbs, 2, axis=0)
+        return U256Array(limbs).to_records()
+
+    return records
+
+
+def write_mapped(args, kernel, fallback, block=None):
+    """Write the outputs of a per-value generator over the input, a block at a time.
+
+    With numpy, each input batch becomes a U256Array and kernel(array) gives
+    the outputs as a U256Array, which go to the sink as records in one go;
+    block, if given, caps how many values kernel sees at once.  fallback(batch)
+    gives the outputs for a list of ints as an iterable of ints; it is used
+    without numpy and for batches holding a value that does not fit in 32
+    bytes, and must give the same outputs as kernel.
+    """
+    out = args.out
+    value = out.value
+    vectorized = _numpy() is not None
+    for batch in read_batches(args):
+        arr = None
+        if vectorized:
+            try:
+                arr = U256Array.from_ints(batch)
+            except OverflowError:
+                pass
+        if arr is None:
+            for y in fallback(batch):
+                value(y)
+            continue
+        step = block or len(arr)
+        for lo in range(0, len(arr), step):
+            write_records(out, kernel(arr[lo : lo + step]).to_records())
+
+
+def write_records(out, buf):
+    """Write a block of 32-byte big-endian records to out, in bulk if the sink can."""
+    records = getattr(out, "records", None)
+    if records is not None:
+        records(buf)
+        return
+    from_bytes = int.from_bytes
+    for off in range(0, len(buf), RECORD_SIZE):
+        out.value(from_bytes(buf[off : off + RECORD_SIZE], "big"))
+
+
+# ── Pairwise engine ───────────────────────────────────────────────────────────
+
+
+def pairwise(
+    args,
+    values,
+    op,
+    commutative=False,
+    diagonal=False,
+    shuffle=False,
+    emit=None,
+    prepare=None,
+):
+    """Apply op(a, b) to pairs of input values and write the results.
+
+    op returns the results for one pair as a sequence, usually empty or of
+    length one; each is passed to emit (default: args.out.value).  As in the
+    original nested loops, pairs (i, j) range over the first len(data) - 1
+    values (cut to --max-inputs, and shuffled if shuffle is set) with i != j,
+    plus i == j when diagonal is set.  For a commutative op, where
+    op(a, b) == op(b, a), only j > i is computed and each result is written
+    twice, or once with --unordered (see PairWalk).
+
+    prepare, if given, is called with batches of values about to be used as
+    b, so that op can precompute something per b in bulk (see run_mod_div);
+    op must still cope with a b it was not prepared for.
+
+    The pairing options (--jobs, --incremental, --mem-limit, --left/--right,
+    --sample-pairs, --top, --where) are described with the _pair_* helpers,
+    PairWalk, TopK and _where.
+    """
+    cross = args.left is not None or args.right is not None
+    out = args.out
+    if args.where is not None:
+        if emit is not None:
+            sys.exit(f"generators.py: {args.generator} writes text lines; --where is not supported")
+        out = out.sink  # the FilteredSink would only see y
+    modes = [
+        name
+        for name, on in (
+            ("--left/--right", cross),
+            ("--sample-pairs", args.sample_pairs is not None),
+            ("--incremental", args.incremental),
+            ("--mem-limit", args.mem_limit),
+            ("--jobs", args.jobs > 1),
+        )
+        if on
+    ]
+    if len(modes) > 1:
+        sys.exit(f"generators.py: {' and '.join(modes)} cannot be combined")
+    twice = commutative and not args.unordered
+    # The (j, i) copy of a commutative result is written by the wrapped op
+    # itself when --where or --top-indices need to tell it from (i, j).
+    mirror = twice and not cross and args.sample_pairs is None
+    if args.where is not None:
+        op = _where(op, args.where, mirror)
+        twice = twice and not mirror
+    walk = PairWalk(op, commutative, diagonal, twice, prepare)
+    top = None
+    if args.top is not None:
+        if emit is not None:
+            sys.exit(f"generators.py: {args.generator} writes text lines; --top is not supported")
+        if args.incremental:
+            sys.exit("generators.py: --top and --incremental cannot be combined")
+        top = TopK(args.top, args.order == "max", args.top_indices)
+        emit = top.push
+        if args.top_indices:
+            if args.mem_limit:
+                sys.exit("generators.py: --top-indices and --mem-limit cannot be combined")
+            # Values travel as (index, value).
+            if prepare is not None:
+                prepare = _unindexed(prepare)
+            walk = PairWalk(_indexed(op, mirror), commutative, diagonal, False, prepare)
+            values = enumerate(values)
+    sink = out if emit is None else None  # results go straight to out
+    if sink is not None and args.jobs == 1:
+        walk.write = lambda data: write_records(out, data)
+    emit = emit or out.value
+    values = itertools.islice(values, args.max_inputs)
+    try:
+        if cross:
+            _pair_cross(args, walk, emit)
+        elif args.incremental:
+            walk.incremental(values, emit, out.flush)
+        elif args.mem_limit:
+            _pair_tiled(walk, values, args.mem_limit, emit)
+        else:
+            _pair_in_memory(args, walk, values, shuffle, emit, top, sink)
+    except _WhereFailed as e:
+        sys.exit(f"generators.py: {e}")
+    if top is not None:
+        top.write(out)
+
+
+def _pair_in_memory(args, walk, values, shuffle, emit, top, sink=None):
+    """Run pairwise() over values held in memory, on one process or --jobs K.
+
+    The values are kept in a U256Store (a list if --top-indices or a value
+    too wide for a record needs one) and walked in bands of rows against
+    tiles of columns, converting only those to ints; prepare is called per
+    column tile, so that what it keeps stays as small as the tile.
+
+    With --jobs K the rows are split into blocks run by K forked workers,
+    which inherit data and op instead of having them pickled.  Each block's
+    results come back to this process and are written as blocks finish or,
+    with --ordered, in row order.  When they go straight to sink (no --top,
+    and a sink with encode()) the workers send them already formatted, so
+    all this process does is write them.
+    """
+    global _PAIR_JOB
+    data = list(values) if args.top_indices else load_store(values)
+    del data[-1:]  # the last value is never paired
+    if args.sample_pairs is not None:
+        _pair_sample(walk, data, args, emit)
+        return
+    if shuffle:
+        random.shuffle(data)
+    end = len(data)
+    prepare = walk.prepare
+    if args.jobs <= 1 or end < 2:
+        walk.tiles(data, 0, end, end, _PAIR_BAND, STORE_TILE, emit, prepare)
+        return
+    if prepare is not None:
+        # The workers prepare their own tiles; this pass leaves whatever
+        # prepare records along the way (such as the divisors ModInverses
+        # reports) in this process, one tile at a time.
+        for clo in range(0, end, STORE_TILE):
+            prepare(data[clo : clo + STORE_TILE])
+    # With --top each worker keeps only its own top K.
+    encode = getattr(sink, "encode", None)
+    _PAIR_JOB = (walk, data, top and (top.k, top.largest, top.indexed), encode)
+    try:
+        blocks = _pair_blocks(end, args.jobs, walk.commutative)
+        for results in _run_blocks(args.jobs, blocks, args.ordered):
+            if isinstance(results, bytes):
+                sink.write_encoded(results)
+                continue
+            for y in results:
+                emit(y)
+    finally:
+        _PAIR_JOB = None
+
+
+class PairWalk:
+    """Which pairs pairwise() visits for an op, and how often each result is written.
+
+    tile() is the inner loop shared by the single-process, --jobs and
+    --mem-limit paths, which run it over different slices of the pair space
+    through tiles().
+    """
+
+    def __init__(self, op, commutative, diagonal, twice, prepare=None):
+        self.op = op
+        self.commutative = commutative
+        self.diagonal = diagonal
+        self.twice = twice
+        self.prepare = prepare
+        self.write = None  # set by pairwise() when results may go to the sink as records
+
+    def tile(self, rows, lo, cols, clo, emit):
+        """Run the pairs (i, j) with i from rows and j from cols.
+
+        rows[0] has index lo and cols[0] has index clo, so the i != j and
+        j > i tests work on the overall indices.  An op with a row attribute,
+        row(a, bs) giving op(a, b) for each b in bs, is given whole rows of a
+        non-commutative walk.  When self.write is set, an op with a records
+        attribute (see _records_hook) is given whole rows of either walk and
+        its results go to self.write as 32-byte records, except for rows the
+        hook turns down.  The diagonal pairs (i, i) go to op.once if op has
+        one (see _where).
+        """
+        op = self.op
+        once = getattr(op, "once", op)
+        batch = getattr(op, "row", None)
+        bulk = getattr(op, "records", None) if self.write is not None else None
+        twice = self.twice
+        for i, a in enumerate(rows, lo):
+            if bulk is not None:
+                k = i - clo
+                if self.commutative:
+                    if self.diagonal and 0 <= k < len(cols):
+                        for y in once(a, a):
+                            emit(y)
+                    spans = ((max(k + 1, 0), len(cols)),)
+                elif self.diagonal or not 0 <= k < len(cols):
+                    spans = ((0, len(cols)),)
+                else:
+                    spans = ((0, k), (k + 1, len(cols)))
+                for start, stop in spans:
+                    if start >= stop:
+                        continue
+                    data = bulk(a, cols, start, stop, twice)
+                    if data is not None:
+                        self.write(data)
+                        continue
+                    for b in cols[start:stop]:
+                        for y in op(a, b):
+                            emit(y)
+                            if twice:
+                                emit(y)
+            elif self.commutative:
+                k = i - clo
+                if self.diagonal and 0 <= k < len(cols):
+                    for y in once(a, a):
+                        emit(y)
+                for b in cols[max(k + 1, 0) :]:
+                    for y in op(a, b):
+                        emit(y)
+                        if twice:
+                            emit(y)
+            elif batch is not None:
+                k = i - clo
+                bs = cols
+                if not self.diagonal and 0 <= k < len(cols):
+                    bs = cols[:k] + cols[k + 1 :]
+                for ys in batch(a, bs):
+                    for y in ys:
+                        emit(y)
+            else:
+                for j, b in enumerate(cols, clo):
+                    if i != j or self.diagonal:
+                        for y in op(a, b):
+                            emit(y)
+
+    def tiles(self, data, lo, hi, end, band, size, emit, prepare=None, start=None):
+        """Run rows lo..hi-1 of data against its columns 0..end-1.
+
+        Rows are taken band at a time and columns size at a time, each
+        sliced out of data (converted to ints, for a U256Store) once per
+        band, so the order is band by band, then column tile by column tile.
+        Row bands are aligned on lo, so any split of the rows at multiples
+        of band runs the pairs in the same order.  So does a split of one
+        band's columns at tile boundaries: start, if given, is the first
+        column tile.  prepare, if given, is called with each column tile
+        before it is used.
+        """
+        for blo in range(lo, hi, band):
+            rows = data[blo : min(blo + band, hi)]
+            first = blo if self.commutative else 0
+            for clo in range(first if start is None else start, end, size):
+                cols = data[clo : min(clo + size, end)]
+                if prepare is not None:
+                    prepare(cols)
+                self.tile(rows, blo, cols, clo, emit)
+
+    def incremental(self, values, emit, flush):
+        """Pair each value with every earlier one as soon as it is read.
+
+        Covers the same pairs as the batch walk, except that the last value is
+        paired too (the end of the input is not known in advance) and nothing
+        is shuffled.  Output is flushed after each value's results.
+        """
+        op = self.op
+        once = getattr(op, "once", op)
+        twice = self.twice
+        seen = []
+        for b in values:
+            if self.diagonal:
+                for y in once(b, b):
+                    emit(y)
+            for a in seen:
+                for y in op(a, b):
+                    emit(y)
+                    if twice:
+                        emit(y)
+                if not self.commutative:
+                    for y in op(b, a):
+                        emit(y)
+            seen.append(b)
+            flush()
+
+    def cross(self, held, stream, emit, swap=False):
+        """Pair each value from stream with every held value: op(held, streamed).
+
+        With swap the held values are the right-hand side: op(streamed, held).
+        Every (a, b) pair is distinct, so each result is written once.
+        """
+        op = self.op
+        for b in stream:
+            if swap:
+                for a in held:
+                    for y in op(b, a):
+                        emit(y)
+            else:
+                for a in held:
+                    for y in op(a, b):
+                        emit(y)
+
+
+class _WhereFailed(ValueError):
+    """--where raised on a pair; pairwise() turns this into the exit message.
+
+    A plain exception rather than sys.exit() so that it also gets out of
+    --jobs workers, which would swallow a SystemExit and leave the parent
+    waiting for their results.
+    """
+
+
+def _where(op, where, mirror=False):
+    """Wrap op so that it keeps only the results y for which where(y, a, b) holds.
+
+    The filter thus runs before --top and before any formatting.  With
+    mirror the wrapped op also returns the (b, a) copies of a commutative
+    op's results, each kept if where(y, b, a) holds, after those of (a, b);
+    its once attribute is the unmirrored op, for pairs (i, i), and its
+    copies attribute returns the two lists separately.
+    """
+
+    def test(y, a, b):
+        try:
+            return where(y, a, b)
+        except Exception as e:
+            raise _WhereFailed(f"--where failed on pair ({a:#x}, {b:#x}): {e!r}") from None
+
+    def filtered(a, b):
+        return [y for y in op(a, b) if test(y, a, b)]
+
+    if not mirror:
+        return filtered
+
+    def copies(a, b):
+        ys = op(a, b)
+        return [y for y in ys if test(y, a, b)], [y for y in ys if test(y, b, a)]
+
+    def mirrored(a, b):
+        ab, ba = copies(a, b)
+        return ab + ba
+
+    mirrored.once = filtered
+    mirrored.copies = copies
+    return mirrored
+
+
+def _unindexed(prepare):
+    """Wrap a pairwise() prepare hook to take (index, value) pairs."""
+    return lambda values: prepare([v for _, v in values])
+
+
+def _indexed(op, mirror):
+    """Wrap op for --top-indices: take (index, value) pairs, return (y, i, j) results.
+
+    With mirror each result is also returned as (y, j, i), standing for the
+    second copy a commutative op writes for (j, i); an op mirrored by
+    _where() says which of its results belong to which copy.
+    """
+    once = getattr(op, "once", op)
+    copies = getattr(op, "copies", None)
+
+    def indexed(ia, jb):
+        i, a = ia
+        j, b = jb
+        if not mirror or i == j:
+            return [(y, i, j) for y in once(a, b)]
+        if copies is None:
+            ab = ba = op(a, b)
+        else:
+            ab, ba = copies(a, b)
+        return [(y, i, j) for y in ab] + [(y, j, i) for y in ba]
+
+    return indexed
+
+
+class TopK:
+    """The k smallest (or, with largest, the k largest) values passed to push().
+
+    Values are kept in a heap of at most k entries, ranked so that the worst
+    kept value is at the root and a value that does not beat it costs one
+    comparison.  With indexed, values are (y, i, j) tuples ranked by y.
+    """
+
+    def __init__(self, k, largest, indexed=False):
+        self.k = k
+        self.largest = largest
+        self.indexed = indexed
+        self.sign = 1 if largest else -1
+        self.heap = []
+
+    def push(self, item):
+        if self.indexed:
+            y, i, j = item
+            entry = (self.sign * y, i, j)
+        else:
+            entry = self.sign * item
+        heap = self.heap
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif heap and entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def items(self):
+        """Return the kept values, best first, as push() received them."""
+        sign = self.sign
+        entries = sorted(self.heap, reverse=True)
+        if self.indexed:
+            return [(sign * y, i, j) for y, i, j in entries]
+        return [sign * e for e in entries]
+
+    def write(self, out):
+        """Write the kept values: hex lines, or "y i j" lines when indexed."""
+        for item in self.items():
+            if self.indexed:
+                y, i, j = item
+                out.line(f"{hexify(y)} {i} {j}")
+            else:
+                out.value(item)
+
+
+def _pair_sample(walk, data, args, emit):
+    """Run --sample-pairs M uniformly chosen pairs of pairwise()'s pair space.
+
+    Pair numbers are drawn with random.Random(--seed), all distinct unless
+    --with-replacement is given, and mapped straight to (i, j), so the cost
+    is O(M) whatever the size of the space.  The space is the ordered pairs
+    (i, j), or the pairs with i < j for a commutative op under --unordered
+    (i <= j when the diagonal is included).  Each sampled pair's results are
+    written once, in the order drawn.
+    """
+    n = len(data)
+    unordered = walk.commutative and args.unordered
+    diagonal = walk.diagonal
+    if unordered:
+        space = n * (n + 1) // 2 if diagonal else n * (n - 1) // 2
+    else:
+        space = n * n if diagonal else n * (n - 1)
+    if not space:
+        return
+    rng = random.Random(args.seed)
+    m = args.sample_pairs
+    if args.with_replacement:
+        picks = (rng.randrange(space) for _ in range(m))
+    else:
+        picks = rng.sample(range(space), min(m, space))
+    op = walk.op
+    for k in picks:
+        if unordered:
+            # k numbers the pairs column by column: j = 1, 2, ... (0, ... with
+            # the diagonal), and i = 0 .. j - 1 (0 .. j).
+            if diagonal:
+                j = (math.isqrt(8 * k + 1) - 1) // 2
+                i = k - j * (j + 1) // 2
+            else:
+                j = (math.isqrt(8 * k + 1) + 1) // 2
+                i = k - j * (j - 1) // 2
+        elif diagonal:
+            i, j = divmod(k, n)
+        else:
+            i, j = divmod(k, n - 1)
+            j += j >= i  # skip the diagonal
+        for y in op(data[i], data[j]):
+            emit(y)
+
+
+def _pair_cross(args, walk, emit):
+    """Run pairwise() as a cross join of the --left and --right inputs.
+
+    The smaller file is read into memory and the other side streamed past
+    it, so memory grows with the smaller side only and output starts with
+    the first streamed value.  "-" (stdin) is always the streamed side.
+    """
+    left, right = args.left, args.right
+    if left is None or right is None:
+        sys.exit("generators.py: --left and --right must be given together")
+    if left == right == "-":
+        sys.exit("generators.py: only one of --left and --right can be stdin")
+    hold_left = right == "-" or (
+        left != "-" and os.path.getsize(left) <= os.path.getsize(right)
+    )
+    held, streamed = (left, right) if hold_left else (right, left)
+    held, stream = read_values(args, held), read_values(args, streamed)
+    if args.top_indices:
+        held, stream = enumerate(held), enumerate(stream)
+    held = list(itertools.islice(held, args.max_inputs))
+    stream = itertools.islice(stream, args.max_inputs)
+    if not hold_left and walk.prepare is not None:
+        walk.prepare(held)
+    walk.cross(held, stream, emit, swap=not hold_left)
+
+
+_TILE_VALUE_BYTES = 100  # a 256-bit int (60 bytes), its list slot, and slack
+
+
+def _pair_tiled(walk, values, mem_limit, emit):
+    """Run pairwise() out of core, holding at most two tiles of values.
+
+    The values are spilled to a scratch file of 32-byte records (in TMPDIR)
+    and walked as a U256Store over its memory map, with row bands and column
+    tiles both holding mem_limit / 2 values' worth of ints.  Nothing is
+    shuffled, and output comes out tile by tile.
+    """
+    fd, path = tempfile.mkstemp(prefix="pairwise-", suffix=".u256")
+    try:
+        with open(fd, "wb+") as fp:
+            count = _spill(values, fp)
+            fp.flush()
+            # mmap() refuses empty files; there is nothing to map anyway.
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) if count else b""
+    finally:
+        os.unlink(path)
+    try:
+        end = count - 1  # the last value is never paired
+        size = max(1, mem_limit // (2 * _TILE_VALUE_BYTES))
+        walk.tiles(U256Store(mm), 0, end, end, size, size, emit, walk.prepare)
+    finally:
+        if count:
+            mm.close()
+
+
+def _spill(values, fp):
+    """Write values to fp as 32-byte records; return how many were written."""
+    count = 0
+    buf = bytearray()
+    for v in values:
+        try:
+            buf += v.to_bytes(RECORD_SIZE, "big")
+        except OverflowError:
+            sys.exit(f"generators.py: value {v:#x} does not fit in a 32-byte record")
+        count += 1
+        if len(buf) >= READ_CHUNK:
+            fp.write(buf)
+            buf = bytearray()
+    fp.write(buf)
+    return count
+
+
+_PAIR_BLOCK = 1 << 18  # most pairs per --jobs block, bounding each result list
+_PAIR_BAND = 64  # most rows per band in PairWalk.tiles() over in-memory data
+_PAIR_JOB = None  # what pairwise() is running, inherited by --jobs workers
+
+
+def _pair_blocks(end, jobs, commutative):
+    """Yield (lo, hi, start, stop) blocks of the in-memory walk with similar pair counts.
+
+    A block runs rows lo..hi-1 against columns start..stop-1 (start None:
+    from the first column the walk would use).  Blocks are whole bands of
+    _PAIR_BAND rows where those are small enough; a band of more than
+    _PAIR_BLOCK pairs is cut into runs of column tiles instead, so blocks
+    stay bounded however many values there are.  Aim for several blocks
+    per worker so that uneven blocks even out; for a commutative op row i
+    holds end - i pairs, so blocks get taller further down.
+    """
+    band = _PAIR_BAND
+    total = end * (end + 1) // 2 if commutative else end * end
+    target = max(1, min(total // (jobs * 8), _PAIR_BLOCK))
+    width = max(1, target // band // STORE_TILE) * STORE_TILE
+    lo = pairs = 0
+    for blo in range(0, end, band):
+        hi = min(blo + band, end)
+        first = blo if commutative else 0
+        if (hi - blo) * (end - first) > target:
+            if lo < blo:
+                yield lo, blo, None, end
+            for start in range(first, end, width):
+                yield blo, hi, start, min(start + width, end)
+            lo, pairs = hi, 0
+            continue
+        if commutative:
+            pairs += (hi - blo) * (2 * end - blo - hi + 1) // 2
+        else:
+            pairs += (hi - blo) * end
+        if pairs >= target:
+            yield lo, hi, None, end
+            lo, pairs = hi, 0
+    if lo < end:
+        yield lo, end, None, end
+
+
+def _pair_block(block):
+    """Worker: run one block of the walk (see _pair_blocks) and return its results.
+
+    The results are a list, or the bytes to write for them if the job has an
+    encode function and it takes them all.
+    """
+    walk, data, top, encode = _PAIR_JOB
+    lo, hi, start, stop = block
+    if top:
+        top = TopK(*top)
+        walk.tiles(data, lo, hi, stop, _PAIR_BAND, STORE_TILE, top.push, walk.prepare, start)
+        return top.items()
+    results = []
+    walk.tiles(data, lo, hi, stop, _PAIR_BAND, STORE_TILE, results.append, walk.prepare, start)
+    if encode is not None:
+        try:
+            return encode(results)
+        except OverflowError:
+            pass  # the writing process reports the value
+    return results
+
+
+def _run_blocks(jobs, blocks, ordered):
+    """Yield the results of blocks run on a pool of forked workers (see _pair_block).
+
+    At most 2 * jobs blocks are in flight, so results do not pile up in
+    memory when the output is slower than the workers.
+    """
+    window = 2 * jobs
+    blocks = iter(blocks)
+    with get_context("fork").Pool(jobs) as pool:
+        if ordered:
+            pending = collections.deque()
+            while True:
+                while len(pending) < window and (block := next(blocks, None)):
+                    pending.append(pool.apply_async(_pair_block, (block,)))
+                if not pending:
+                    return
+                yield pending.popleft().get()
+        done = queue.Queue()
+        running = 0
+        while True:
+            while running < window and (block := next(blocks, None)):
+                pool.apply_async(
+                    _pair_block, (block,), callback=done.put, error_callback=done.put
+                )
+                running += 1
+            if not running:
+                return
+            results = done.get()
+            running -= 1
+            if isinstance(results, BaseException):
+                raise results
+            yield results
+
+
 # ── Generator implementations ─────────────────────────────────────────────────
 
 
 def run_256bitrepr(args):
     """Show last-8-char hex, binary repr, and integer for each stdin line."""
-    for line in sys.stdin:
+    out = args.out
+    for line in read_lines(args):
         line = line.replace("\n", "").replace("\r", "")
         h = line[-8:]
         i = int(h, 16)
         b = bin(i)
-        print(h, b, i)
+        out.line(f"{h} {b} {i}")
 
 
 def run_64hex(args):
     """Reduce each hex stdin line modulo N and print as 64-char hex."""
-    for line in sys.stdin:
-        line = (
-            line.replace("\n", "").replace("\r", "").replace("0x", "").replace("L", "")
-        )
-        if len(line) > 1:
-            try:
-                print(hexify(int(line, 16) % N))
-            except Exception:
-                pass
+    out = args.out
+    for x in read_hex_lines(args, lambda line: len(line) > 1):
+        out.value(x % N)
 
 
 def run_freader(args):
@@ -80,6 +2124,7 @@ def run_freader(args):
       - shannon_entropy now accepts bytes natively (no chr/ord round-trip).
       - s.encode('hex') replaced with s.hex().
     """
+    out = args.out
 
     def shannon_entropy(data):
         if not data:
@@ -112,7 +2157,7 @@ def run_freader(args):
                 s = data[i : i + l]
                 e = shannon_entropy(s)
                 if e > thresshold:
-                    print(s.hex(), e)  # Fixed: was s.encode('hex') (Python 2)
+                    out.line(f"{s.hex()} {e}")  # Fixed: was s.encode('hex') (Python 2)
                 del e
                 del s
             del data
@@ -122,24 +2167,26 @@ def run_freader(args):
 
 def run_intcounter6(args):
     """Infinite: print (P^i % N) and (N^i % N) for i = 0, 1, 2, …"""
+    out = args.out
     i = -1
     while True:
         i += 1
         a = (P**i) % N
         b = (N**i) % N
-        print(hex(a).replace("0x", "").replace("L", "").zfill(64))
-        print(hex(b).replace("0x", "").replace("L", "").zfill(64))
+        out.value(a)
+        out.value(b)
 
 
 def run_intcounter9(args):
     """Infinite: print floor(sqrt(x^3+7)) variants mod N for x = 2, 3, …"""
+    out = args.out
     x = 1
     while True:
         x += 1
         y = int(math.sqrt(x**3 + 7))
-        print(hex((y - 1) % N).replace("0x", "").replace("L", "").zfill(64))
-        print(hex(y % N).replace("0x", "").replace("L", "").zfill(64))
-        print(hex((y + 1) % N).replace("0x", "").replace("L", "").zfill(64))
+        out.value((y - 1) % N)
+        out.value(y % N)
+        out.value((y + 1) % N)
 
 
 def run_intcounter10(args):
@@ -147,34 +2194,38 @@ def run_intcounter10(args):
 
     Requires: python-stdnum  (pip install python-stdnum)
     """
+    out = args.out
     from stdnum import luhn
 
     i = 0
     while True:
         i += 1
         c = luhn.checksum(str(i))
-        print(str(i) + str(c))
+        out.line(str(i) + str(c))
 
 
 def run_intcounter14(args):
     """Infinite: print sequential integers as 64-char hex (starting at 1)."""
+    out = args.out
     x = 0
     while True:
         x += 1
-        print(hexify(x))
+        out.value(x)
 
 
 def run_intcounter15(args):
     """Infinite: print ((x^3 << x) % N) as 64-char hex for x = 2, 3, …"""
+    out = args.out
     x = 1
     while True:
         x += 1
         y = ((x**3) << x) % N
-        print(hexify(y))
+        out.value(y)
 
 
 def run_perms(args):
     """Read lines from stdin; print unique permutations (lower, original, upper)."""
+    out = args.out
 
     def sort_uniq(sequence):
         return map(operator.itemgetter(0), itertools.groupby(sorted(sequence)))
@@ -195,13 +2246,13 @@ def run_perms(args):
             if idx == 20:
                 tmp = list(sort_uniq(tmp))
                 for item in tmp:
-                    print(item)
+                    out.line(item)
                 tmp = []
         return tmp, idx
 
     tmp = []
     idx = 0
-    for line in sys.stdin:
+    for line in read_lines(args):
         try:
             line = line.replace("\n", "")
             if not allequal(line):
@@ -209,25 +2260,27 @@ def run_perms(args):
                 tmp, idx = perms_inner(tmp, idx, line)
                 tmp, idx = perms_inner(tmp, idx, line.upper())
             else:
-                print(line)
+                out.line(line)
         except Exception:
             pass
 
 
 def run_perms2(args):
     """Print every permutation of a–z, 0–9 and space (very long — pipe to head)."""
+    out = args.out
     p = itertools.permutations("abcdefghijklmnopqrstuvwxyz0123456789 ")
     for i in p:
-        print("".join(i))
+        out.line("".join(i))
 
 
 def run_perms3(args):
     """Read lines from stdin; print all permutations of each line."""
-    for line in sys.stdin:
+    out = args.out
+    for line in read_lines(args):
         try:
             line = line.replace("\n", "")
             for i in itertools.permutations(line):
-                print("".join(i))
+                out.line("".join(i))
         except Exception:
             pass
 
@@ -237,6 +2290,7 @@ def run_probagen(args):
 
     Requires: numpy  (pip install numpy)
     """
+    out = args.out
     import numpy
 
     weights = [
@@ -290,28 +2344,30 @@ def run_probagen(args):
             recalculate_probs(j / 100.0)
             for _ in range(1000):
                 i = gen_samples()
-                print(hex(i).replace("0x", "").replace("L", "").zfill(64))
+                out.value(i)
 
     gen()
 
 
 def run_randomint(args):
     """Infinite: random 256-bit integers seeded by the seed argument."""
+    out = args.out
     random.seed(args.seed)
     while True:
         i = random.randint(0, (2**256))
-        print(hex(i).replace("0x", "").replace("L", "").zfill(64))
+        out.value(i)
 
 
 def run_randomint2(args):
     """Infinite: random 256-bit integers; seed auto-increments every 1000 values."""
+    out = args.out
     seed = 0
     random.seed(seed)
     c = 0
     while True:
         c += 1
         i = random.randint(0, (2**256))
-        print(hex(i).replace("0x", "").replace("L", "").zfill(64))
+        out.value(i)
         if (c % 1000) == 0:
             seed += 1
             random.seed(seed)
@@ -319,15 +2375,17 @@ def run_randomint2(args):
 
 def run_randomint3(args):
     """Infinite: random integers in [2^32, 2^32 + 2^31), seeded by the seed argument."""
+    out = args.out
     random.seed(args.seed)
     start = 2**32
     while True:
         i = start + random.randint(0, (2**31))
-        print(hex(i).replace("0x", "").replace("L", "").zfill(64))
+        out.value(i)
 
 
 def run_randomint4(args):
     """Infinite: 256-bit hex strings assembled from random bytes, seeded by the seed argument."""
+    out = args.out
     random.seed(args.seed)
 
     def r256b():
@@ -340,37 +2398,40 @@ def run_randomint4(args):
         return strhex
 
     while True:
-        print(r256b())
+        out.line(r256b())
 
 
 def run_replacer(args):
     """Echo each stdin line, stripping CR/LF."""
-    for line in sys.stdin:
-        print(line.replace("\n", "").replace("\r", ""))
+    out = args.out
+    for line in read_lines(args):
+        out.line(line.replace("\n", "").replace("\r", ""))
 
 
 def run_rot13(args):
     """Apply ROT13 (Caesar cipher) to each stdin line."""
+    out = args.out
     p = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ "
     r = "nopqrstuvwxyzabcdefghijklmNOPQRSTUVWXYZABCDEFGHIJKLM "
 
     def rot13(test):
         return "".join(r[p.find(l)] for l in test)
 
-    for line in sys.stdin:
-        print(rot13(line.rstrip()))
+    for line in read_lines(args):
+        out.line(rot13(line.rstrip()))
 
 
 def run_simple_stat_analysis(args):
     """Count per-bit-position frequency across 256-bit hex lines from stdin."""
+    out = args.out
     bits = 256
     freqs = [0] * bits
-    for line in sys.stdin:
-        b = format(int(line, 16), "08b").zfill(256)
+    for x in read_values(args):
+        b = format(x, "08b").zfill(256)
         for i in range(bits):
             if b[i] == "1":
                 freqs[i] += 1
-    print(freqs)
+    out.line(str(freqs))
 
 
 def run_testSTRToSHA512(args):
@@ -379,15 +2440,16 @@ def run_testSTRToSHA512(args):
     Note: Original (testSTRToSHA512.py) passed a str to hashlib.update(), which
     requires bytes in Python 3. Fixed to encode to UTF-8 before hashing.
     """
+    out = args.out
 
     def sha512(s):
         n = hashlib.sha512()
         n.update(s.encode("utf-8"))  # Fixed: original passed str (Python 2 style)
         return n.hexdigest()
 
-    for line in sys.stdin:
+    for line in read_lines(args):
         line = line.replace("\r", "").replace("\n", "")
-        print(hexify(int(sha512(line), 16) % N))
+        out.value(int(sha512(line), 16) % N)
 
 
 def run_testadd(args):
@@ -395,29 +2457,20 @@ def run_testadd(args):
     skip = int(
         "00000000000000000000000000000000000000000000000000000027eb78574a", 16
     )
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
-
-    start = 0
-    end = len(data) - 1
+    def add(a, b):
+        x = a + b
+        if x not in [a, b]:
+            y = x % N
+            if skip < y:
+                return (y,)
+        return ()
 
-    for i in range(start, end):
-        for j in range(start, end):
-            if i != j:
-                x = data[i] + data[j]
-                if x not in [data[i], data[j]]:
-                    y = x % N
-                    if skip < y:
-                        print(hexify(y))
+    pairwise(args, read_values(args), add, commutative=True)
 
 
 def run_testbitpatterns(args):
     """Infinite: generate 256-bit hex values from concatenated binary strings."""
+    out = args.out
 
     def test(i, a):
         b = ""
@@ -427,61 +2480,43 @@ def run_testbitpatterns(args):
             else:
                 b += bin(i).replace("0b", "")
             i += 1
-        return hexify(int(b, 2))
+        return int(b, 2)
 
     i = 0
     while True:
         i += 1
-        print(test(i, False))
-        print(test(i, True))
+        out.value(test(i, False))
+        out.value(test(i, True))
 
 
 def run_testboolefuncs(args):
     """Read hex lines from stdin; print AND/OR/XOR pairwise combinations mod N."""
     skip = 0
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
-
-    random.shuffle(data)
-
-    start = 0
-    end = len(data) - 1
-
     def diff(x, i, j):
         if x not in [i, j]:
             y = x % N
             if skip < y:
-                return hexify(y)
+                return y
 
-    for i in range(start, end):
-        for j in range(start, end):
-            if i != j:
-                x = data[i] and data[j]
-                if d := diff(x, data[i], data[j]):
-                    print(d)
-                x = data[i] or data[j]
-                if d := diff(x, data[i], data[j]):
-                    print(d)
-                x = data[i] ^ data[j]
-                if d := diff(x, data[i], data[j]):
-                    print(d)
+    # `and`/`or` return one of their operands, which diff() always drops, so
+    # only the XOR term yields values and ops(a, b) == ops(b, a).
+    def ops(a, b):
+        return [d for x in (a and b, a or b, a ^ b) if (d := diff(x, a, b))]
+
+    pairwise(args, read_values(args), ops, commutative=True, shuffle=True)
 
 
 def run_testconcatnumbers(args):
     """Read lines from stdin; concatenate each with numbers 0..999 using various separators."""
+    out = args.out
 
     def c2(line, n):
         for sep in list(" *+-_/?<>") + [""]:
-            print(line + sep + str(n))
-            print(str(n) + sep + line)
+            out.line(line + sep + str(n))
+            out.line(str(n) + sep + line)
 
     max_concat = 1000
-    for line in sys.stdin:
+    for line in read_lines(args):
         line = line.rstrip()
         for i in range(max_concat):
             c2(line, i)
@@ -493,17 +2528,13 @@ def run_testinv(args):
     Note: Original (testinv.py) used 'K' (uppercase) on the P-k line, causing a
     NameError.  Fixed to 'k' (lowercase) to match the assigned input variable.
     """
+    out = args.out
     b256 = 2**256
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            k = int(line, 16)
-            print(hexify((N - k) % N))
-            print(hexify((P - k) % N))  # Fixed: was 'K' (NameError) in original
-            print(hexify((k ^ b256) % N))
-            print(hexify((b256 - k) % N))
-        except Exception:
-            pass
+    for k in read_values(args):
+        out.value((N - k) % N)
+        out.value((P - k) % N)  # Fixed: was 'K' (NameError) in original
+        out.value((k ^ b256) % N)
+        out.value((b256 - k) % N)
 
 
 def run_testmean(args):
@@ -511,15 +2542,8 @@ def run_testmean(args):
 
     Note: This generator first consumes all stdin, then enters an infinite loop.
     """
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            i = int(line, 16)
-            if i > 0:
-                data.append(i)
-        except Exception:
-            pass
+    out = args.out
+    data = [i for i in read_values(args) if i > 0]
 
     random.shuffle(data)
 
@@ -531,62 +2555,47 @@ def run_testmean(args):
     j = N
     while True:
         j -= m
-        print(hexify(int(j) % N))
+        out.value(int(j) % N)
 
 
 def run_testmedian(args):
     """Read hex lines from stdin; print rolling pair-average mod N."""
+    out = args.out
     j = 0
     accum = 0
     max_j = 2
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        if len(line) > 2 and len(line) <= 64:
-            try:
-                accum += int(line, 16)
-                j += 1
-                if j >= max_j:
-                    j = 0
-                    accum = 0
-                print(hexify(accum // max_j % N))
-            except Exception:
-                pass
+    for x in read_hex_lines(args, lambda line: 2 < len(line) <= 64):
+        accum += x
+        j += 1
+        if j >= max_j:
+            j = 0
+            accum = 0
+        out.value(accum // max_j % N)
 
 
 def run_testmodulo3(args):
     """Infinite: print ((p % n)^i) % n as 64-char hex for i = 1, 2, 3, …"""
+    out = args.out
     n = int("FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141", 16)
     p = int("FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F", 16)
     i = 0
     while True:
         i += 1
-        print(hexify(((p % n) ** i) % n))
+        out.value(((p % n) ** i) % n)
 
 
 def run_testmult(args):
     """Read hex lines from stdin; print all pairwise products mod N."""
     skip = 0
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
-
-    random.shuffle(data)
-
-    start = 0
-    end = len(data) - 1
+    def mult(a, b):
+        x = a * b
+        if x not in [a, b]:
+            y = x % N
+            if skip < y:
+                return (y,)
+        return ()
 
-    for i in range(start, end):
-        for j in range(start, end):
-            if i != j:
-                x = data[i] * data[j]
-                if x not in [data[i], data[j]]:
-                    y = x % N
-                    if skip < y:
-                        print(hexify(y))
+    pairwise(args, read_values(args), mult, commutative=True, shuffle=True)
 
 
 def run_testpivot(args):
@@ -595,6 +2604,7 @@ def run_testpivot(args):
     Note: Original (testpivot.py) used '/' for integer division (Python 2 style),
     causing a TypeError in Python 3.  Fixed to use '//' (floor division).
     """
+    out = args.out
 
     def pivot(s, tmp, i):
         l = len(s)
@@ -608,7 +2618,7 @@ def run_testpivot(args):
         return tmp
 
     tmp3 = []
-    for line in sys.stdin:
+    for line in read_lines(args):
         line = line.replace("\r", "").replace("\n", "")
         tmp = []
         tmp1 = pivot(line, tmp, False)
@@ -617,22 +2627,17 @@ def run_testpivot(args):
             tmp3.append(i)
         if len(tmp3) > 1000000:
             for i in tmp3:
-                print(i)
+                out.line(i)
             tmp3 = []
 
 
 def run_testpwr(args):
     """Read hex lines from stdin; print each value raised to powers 96..127 mod N."""
+    out = args.out
     skip = 0
     MIN_PWR = 96
     MAX_PWR = 128
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
+    data = list(read_values(args))
 
     end = len(data) - 1
     start = 0
@@ -641,59 +2646,55 @@ def run_testpwr(args):
         for j in range(MIN_PWR, MAX_PWR):
             k = data[i] ** j
             if k > 10000000:
-                print(hexify(k % N))
+                out.value(k % N)
 
 
 def run_testrevert(args):
     """Read hex lines from stdin; print each line with characters reversed."""
-    for line in sys.stdin:
+    out = args.out
+    for line in read_lines(args):
         line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        print(line[::-1])
+        out.line(line[::-1])
 
 
 def run_testrot(args):
     """Read hex lines from stdin; print rotate-left and rotate-right bit variants mod N."""
+    out = args.out
     SKIP = 0
     j = 0
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            k = int(line, 16)
-            for i in range(2, 254):
-                j += 1
-                if j > SKIP:
-                    a = rol(k, i, 256) % N
-                    b = ror(k, i, 256) % N
-                    if a > 1000000 and a != k:
-                        print(hexify(a))
-                    if b > 1000000 and a != k:
-                        print(hexify(b))
-        except Exception:
-            pass
+    for k in read_values(args):
+        for i in range(2, 254):
+            j += 1
+            if j > SKIP:
+                a = rol(k, i, 256) % N
+                b = ror(k, i, 256) % N
+                if a > 1000000 and a != k:
+                    out.value(a)
+                if b > 1000000 and a != k:
+                    out.value(b)
 
 
 def run_testsec256k1(args):
     """Read hex lines from stdin; apply secp256k1 curve candidate operations."""
+    out = args.out
 
     def quberoot(i):
         return -((-i) ** (1.0 / 3.0))
 
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
+    for i in read_values(args):
         try:
-            i = int(line, 16)
             k = int(math.sqrt((i**3) + 7))
-            print(hexify((k - 1) % N))
-            print(hexify(k % N))
-            print(hexify((k + 1) % N))
+            out.value((k - 1) % N)
+            out.value(k % N)
+            out.value((k + 1) % N)
             k = int(quberoot((i**2) - 7))
-            print(hexify((k - 1) % N))
-            print(hexify(k % N))
-            print(hexify((k + 1) % N))
+            out.value((k - 1) % N)
+            out.value(k % N)
+            out.value((k + 1) % N)
             k = int((3 * (i**2)) / 2)
-            print(hexify((k - 1) % N))
-            print(hexify(k % N))
-            print(hexify((k + 1) % N))
+            out.value((k - 1) % N)
+            out.value(k % N)
+            out.value((k + 1) % N)
         except Exception:
             pass
 
@@ -704,6 +2705,7 @@ def run_testsha256(args):
     Note: Original (testsha256.py) used bytes.encode('hex') (Python 2 API).
     Fixed to use bytes.hex() for Python 3 compatibility.
     """
+    out = args.out
 
     def sha256bin(s):
         if isinstance(s, str):
@@ -713,33 +2715,32 @@ def run_testsha256(args):
     def hexify_bytes(s):
         return s.hex().zfill(64)  # Fixed: was s.encode('hex') (Python 2)
 
-    for line in sys.stdin:
+    for line in read_lines(args):
         line = line.rstrip()
         data = sha256bin(line)
         for _ in range(101):
             data = sha256bin(data)
-            print(hexify_bytes(data))
+            out.line(hexify_bytes(data))
 
 
 def run_testsqrt(args):
     """Read hex lines from stdin; apply iterated integer sqrt 16 times mod N."""
-    for line in sys.stdin:
-        line = line.replace("\n", "")
-        if len(line) > 2:
-            try:
-                i = int(line, 16)
-                for _ in range(16):
-                    i = int(math.sqrt(i)) % N
-                    if i > 10000000:
-                        print(hexify(i))
-            except Exception:
-                pass
+    out = args.out
+    for i in read_values(args):
+        try:
+            for _ in range(16):
+                i = int(math.sqrt(i)) % N
+                if i > 10000000:
+                    out.value(i)
+        except Exception:
+            pass
 
 
 def run_teststr(args):
     """Read hex lines from stdin; produce pairwise string concatenation combinations."""
+    out = args.out
     data = []
-    for line in sys.stdin:
+    for line in read_lines(args):
         line = line.replace("0x", "").replace("L", "").replace("\n", "")
         try:
             data.append(line)
@@ -752,72 +2753,74 @@ def run_teststr(args):
     for i in range(start, end):
         for j in range(start, end):
             s = data[i] + data[j]
-            print(s)
-            print(s.title())
+            out.line(s)
+            out.line(s.title())
             s = f"{data[i]} {data[j]}"
-            print(s)
-            print(s.title())
+            out.line(s)
+            out.line(s.title())
             s = data[i].lower() + data[j].lower()
-            print(s)
-            print(s.title())
+            out.line(s)
+            out.line(s.title())
             s = f"{data[i].lower()} {data[j].lower()}"
-            print(s)
-            print(s.title())
+            out.line(s)
+            out.line(s.title())
             s = data[i].upper() + data[j].upper()
             s = f"{data[i].upper()} {data[j].upper()}"
             s = data[i].lower() + data[j].upper()
-            print(s)
-            print(s.title())
+            out.line(s)
+            out.line(s.title())
             s = f"{data[i].lower()} {data[j].upper()}"
-            print(s.title())
+            out.line(s.title())
             s = data[i].upper() + data[j].lower()
-            print(s)
-            print(s.title())
+            out.line(s)
+            out.line(s.title())
             s = f"{data[i].upper()} {data[j].lower()}"
-            print(s)
-            print(s.title())
+            out.line(s)
+            out.line(s.title())
 
 
 def run_teststr2(args):
     """Read stdin lines; print each with title-case, lower-case, and upper-case variants."""
-    for line in sys.stdin:
+    out = args.out
+    for line in read_lines(args):
         line = line.replace("\n", "").replace("\r", "")
-        print(line)
+        out.line(line)
         s = line.title()
         if s != line:
-            print(s)
+            out.line(s)
         s = line.lower()
         if s != line:
-            print(s)
+            out.line(s)
         s = line.upper()
         if s != line:
-            print(s)
+            out.line(s)
 
 
 def run_teststr3(args):
     """Read all stdin lines; print pairwise join combinations with case variants."""
+    out = args.out
     data = []
-    for line in sys.stdin:
+    for line in read_lines(args):
         line = line.replace("\n", "").replace("\r", "")
         data.append(line)
 
     def join2(a, b):
-        print(f"{a.title()} {b}")
-        print(a.title() + b)
-        print(f"{a} {b.title()}")
-        print(a + b.title())
-        print(f"{a.title()} {b.title()}")
-        print(a.title() + b.title())
-        print(f"{a.lower()} {b.lower()}")
-        print(a.lower() + b.lower())
-        print(f"{a.upper()} {b.upper()}")
-        print(a.upper() + b.upper())
-        print(f"{a.lower()} {b.upper()}")
-        print(a.lower() + b.upper())
-        print(f"{a.upper()} {b.lower()}")
-        print(a.upper() + b.lower())
-        print(f"{a} {b}")
-        print(a + b)
+        out.line(f"{a.title()} {b}")
+        out.line(a.title() + b)
+        out.line(f"{a} {b.title()}")
+        out.line(a + b.title())
+        out.line(f"{a.title()} {b.title()}")
+        out.line(a.title() + b.title())
+        out.line(f"{a.lower()} {b.lower()}")
+        out.line(a.lower() + b.lower())
+        out.line(f"{a.upper()} {b.upper()}")
+        out.line(a.upper() + b.upper())
+        out.line(f"{a.lower()} {b.upper()}")
+        out.line(a.lower() + b.upper())
+        out.line(f"{a.upper()} {b.lower()}")
+        out.line(a.upper() + b.lower())
+        out.line(f"{a} {b}")
+        out.line(a + b)
 
     for i in range(len(data) - 1):
         for j in range(len(data) - 1):
@@ -829,120 +2832,178 @@ def run_testsub(args):
     skip = int(
         "00000000000000000000000000000000000000000000000000000027eb78574a", 16
     )
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
-
-    start = 0
-    end = len(data) - 1
+    def sub(a, b):
+        x = abs(a - b)
+        if x not in [a, b]:
+            y = x % N
+            if skip < y:
+                return (y,)
+        return ()
 
-    for i in range(start, end):
-        for j in range(start, end):
-            if i != j:
-                x = abs(data[i] - data[j])
-                if x not in [data[i], data[j]]:
-                    y = x % N
-                    if skip < y:
-                        print(hexify(y))
+    pairwise(args, read_values(args), sub, commutative=True)
 
 
 def run_testsub256(args):
     """Read hex lines from stdin; print N-k, P-k, and 2^256-k mod N for each."""
+    out = args.out
     C = 2**256
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
+    data = list(read_values(args))
 
     start = 0
     end = len(data) - 1
 
     for i in range(start, end):
-        print(hexify((N - data[i]) % N))
-        print(hexify((P - data[i]) % N))
-        print(hexify((C - data[i]) % N))
+        out.value((N - data[i]) % N)
+        out.value((P - data[i]) % N)
+        out.value((C - data[i]) % N)
 
 
 def run_testxor(args):
     """Read hex lines from stdin; XOR each value with 0..255 and print results mod N."""
+    def test_xor(batch):
+        return ((i ^ j) % N for i in batch for j in range(256))
 
-    def test_xor(i):
-        for j in range(256):
-            k = (i ^ j) % N
-            print(hexify(k))
+    def kernel(block):
+        # 256 copies of each value, low limb XORed with 0..255; all are
+        # below 2**256 < 2N, so one conditional subtraction reduces them.
+        np = _numpy()
+        limbs = np.repeat(block.limbs, 256, axis=0)
+        limbs[:, 3] ^= np.tile(np.arange(256, dtype=np.uint64), len(block))
+        return U256Array(limbs).reduce(N)
 
-    for line in sys.stdin:
-        line = line.replace("\n", "")
-        try:
-            test_xor(int(line, 16))
-        except Exception:
-            pass
+    write_mapped(args, kernel, test_xor, block=1024)
 
 
 def run_testxor2(args):
     """Read hex lines from stdin; print pairwise XOR variants mod N and P."""
-    data = []
-    for line in sys.stdin:
-        line = line.replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
-
     def xor(a, b):
         k = abs(a ^ b)
         if k not in [a, b]:
-            c = k % N
-            if c > 100000000:
-                print(hexify(c))
-            c = (N - k) % N
-            if c > 100000000:
-                print(hexify(c))
-            c = (P - k) % N
-            if c > 100000000:
-                print(hexify(c))
-
-    for i in range(len(data) - 1):
-        for j in range(len(data) - 1):
-            xor(data[i], data[j])
+            return [c for c in (k % N, (N - k) % N, (P - k) % N) if c > 100000000]
+        return ()
+
+    def xor_block(a, block):
+        # The same three results and filter as xor() for a row of pairs.
+        # a ^ b is below 2**256 < 2N, and P - k is below 2N or, for k > P,
+        # wraps to a value that N brings back to P - k + N.
+        np = _numpy()
+        k = block ^ a
+        c1 = k.reduce(N)
+        c2 = np.where((c1 == 0)[:, None], 0, c1.rsub(N).limbs)
+        d, wrapped = _sub_limbs(_as_limbs(P), k.limbs)
+        c3 = np.where(wrapped[:, None], _add_limbs(d, _as_limbs(N)), U256Array(d).reduce(N).limbs)
+        limbs = np.stack([c1.limbs, c2, c3], axis=1)
+        # k in [a, b] exactly when b == 0 or a == 0.
+        keep = np.stack([U256Array(limbs[:, r]) > 100000000 for r in range(3)], axis=1)
+        keep &= (block != 0)[:, None] & (a != 0)
+        return limbs, keep
+
+    xor.records = _records_hook(xor_block)
+    # The original loop also paired each value with itself.
+    pairwise(args, read_values(args), xor, commutative=True, diagonal=True)
 
 
 # ── New generators ────────────────────────────────────────────────────────────
 
 
+def batch_inverse(values, n):
+    """Return the inverses mod n of values, with 0 for those that have none.
+
+    Montgomery's trick: a single pow(x, -1, n) of the product of all the
+    values, then three multiplications per value to peel each inverse off
+    it.  Values that are 0 mod n are left out of the product; if it still has
+    no inverse (n not prime), each value is inverted on its own.
+    """
+    residues = [v % n for v in values]
+    prefix = []
+    acc = 1
+    for r in residues:
+        prefix.append(acc)
+        if r:
+            acc = acc * r % n
+    try:
+        inv = pow(acc, -1, n)
+    except ValueError:
+        return [_inverse(r, n) for r in residues]
+    inverses = [0] * len(residues)
+    for k in range(len(residues) - 1, -1, -1):
+        r = residues[k]
+        if r:
+            inverses[k] = inv * prefix[k] % n
+            inv = inv * r % n
+    return inverses
+
+
+def _inverse(x, n):
+    try:
+        return pow(x, -1, n)
+    except ValueError:
+        return 0
+
+
+_INVERSE_CACHE = 1 << 16  # most inverses ModInverses.get() keeps beyond a load()
+
+
+class ModInverses:
+    """Inverses mod n of the divisors a generator is using.
+
+    load() inverts a whole batch with batch_inverse() and keeps the results,
+    replacing the previous batch; get() looks a divisor up and inverts it on
+    its own if it was not loaded.  0 stands for "no inverse".  Divisors found
+    to have none are remembered for report().
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.table = {}
+        self.bad = set()
+
+    def load(self, values):
+        values = list(values)
+        self.table = dict(zip(values, batch_inverse(values, self.n)))
+        self.bad.update(v for v, inv in self.table.items() if not inv)
+
+    def get(self, b):
+        inv = self.table.get(b)
+        if inv is None:
+            inv = _inverse(b, self.n)
+            if len(self.table) < _INVERSE_CACHE:
+                self.table[b] = inv
+            if not inv:
+                self.bad.add(b)
+        return inv
+
+    def report(self, name):
+        """Write one stderr line per divisor that had no inverse."""
+        for b in sorted(self.bad):
+            if b == 0:
+                reason = "divisor is zero"
+            else:
+                reason = f"gcd(b,N)={math.gcd(b, self.n)} (not invertible)"
+            print(f"{name}: skipped pairs with divisor {hexify(b)}: {reason}", file=sys.stderr)
+
+
 def run_mod_div(args):
     """Read hex lines from stdin; compute pairwise modular division a * inv(b) mod N.
 
-    When b has no modular inverse (gcd(b, N) != 1), the pair is skipped and a
-    note is written to stderr.
+    The divisors are inverted a column tile at a time, in one batch per tile
+    (see ModInverses), so each pair costs one multiplication.  When b has no modular inverse
+    (gcd(b, N) != 1), its pairs are skipped and the divisor is listed on
+    stderr once the run is done.
     """
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
+    inverses = ModInverses(N)
+    get = inverses.get
 
-    for i in range(len(data) - 1):
-        for j in range(len(data) - 1):
-            if i != j:
-                a, b = data[i], data[j]
-                if b == 0:
-                    print(f"mod-div: skipping pair ({i},{j}): divisor is zero", file=sys.stderr)
-                    continue
-                if math.gcd(b, N) != 1:
-                    print(f"mod-div: skipping pair ({i},{j}): gcd(b,N)={math.gcd(b,N)} (not invertible)", file=sys.stderr)
-                    continue
-                result = (a * pow(b, -1, N)) % N
-                print(hexify(result))
+    def div(a, b):
+        inv = get(b)
+        if not inv:
+            return ()
+        return (a * inv % N,)
+
+    try:
+        pairwise(args, read_values(args), div, prepare=inverses.load)
+    finally:
+        inverses.report(args.generator)
 
 
 def run_neg(args):
@@ -950,13 +3011,9 @@ def run_neg(args):
 
     Semantics: additive inverse in Z/NZ — equivalent to (N - x) mod N.
     """
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            x = int(line, 16)
-            print(hexify((-x) % N))
-        except Exception:
-            pass
+    out = args.out
+    for x in read_values(args):
+        out.value((-x) % N)
 
 
 def run_abs_diff(args):
@@ -965,18 +3022,7 @@ def run_abs_diff(args):
     Similar to mod-sub but without a skip threshold, providing a clean
     pairwise absolute-difference stream.
     """
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
-
-    for i in range(len(data) - 1):
-        for j in range(len(data) - 1):
-            if i != j:
-                print(hexify(abs(data[i] - data[j]) % N))
+    pairwise(args, read_values(args), lambda a, b: (abs(a - b) % N,), commutative=True)
 
 
 def run_bit_not(args):
@@ -986,13 +3032,7 @@ def run_bit_not(args):
     Output: 64-char lowercase hex.
     """
     mask = (1 << 256) - 1
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            x = int(line, 16)
-            print(hexify((~x) & mask))
-        except Exception:
-            pass
+    write_mapped(args, lambda block: ~block, lambda batch: [(~x) & mask for x in batch])
 
 
 def run_bit_and(args):
@@ -1001,18 +3041,11 @@ def run_bit_and(args):
     Operates on raw 256-bit words (no field reduction).
     Output: 64-char lowercase hex per pair.
     """
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
+    def bit_and(a, b):
+        return (a & b,)
 
-    for i in range(len(data) - 1):
-        for j in range(len(data) - 1):
-            if i != j:
-                print(hexify(data[i] & data[j]))
+    bit_and.records = _records_hook(lambda a, block: ((block & a).limbs[:, None], None))
+    pairwise(args, read_values(args), bit_and, commutative=True)
 
 
 def run_bit_or(args):
@@ -1021,18 +3054,11 @@ def run_bit_or(args):
     Operates on raw 256-bit words (no field reduction).
     Output: 64-char lowercase hex per pair.
     """
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
+    def bit_or(a, b):
+        return (a | b,)
 
-    for i in range(len(data) - 1):
-        for j in range(len(data) - 1):
-            if i != j:
-                print(hexify(data[i] | data[j]))
+    bit_or.records = _records_hook(lambda a, block: ((block | a).limbs[:, None], None))
+    pairwise(args, read_values(args), bit_or, commutative=True)
 
 
 def run_shl(args):
@@ -1043,13 +3069,7 @@ def run_shl(args):
     """
     k = args.shift
     mask = (1 << 256) - 1
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            x = int(line, 16)
-            print(hexify((x << k) & mask))
-        except Exception:
-            pass
+    write_mapped(args, lambda block: block << k, lambda batch: [(x << k) & mask for x in batch])
 
 
 def run_shr(args):
@@ -1059,13 +3079,50 @@ def run_shr(args):
     Use --shift k to specify the shift amount (default: 1, range 0-255).
     """
     k = args.shift
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            x = int(line, 16)
-            print(hexify(x >> k))
-        except Exception:
-            pass
+    write_mapped(args, lambda block: block >> k, lambda batch: [x >> k for x in batch])
+
+
+# Exact integer arithmetic on Decimals of any length, for batch_gcd().
+_EXACT = decimal.Context(
+    prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN
+)
+
+
+def batch_gcd(values):
+    """Return [gcd(x, product of the other values) for x in values].
+
+    Bernstein's batch GCD: a product tree is built over the values and its
+    root is reduced back down it, mod the square of each node, so that each
+    leaf x is left with (product mod x**2); (product mod x**2) // x is
+    (product / x) mod x, whose gcd with x is the result.  The trees are built
+    from decimal.Decimal integers, whose multiplication and division are
+    quasi-linear in the number of digits where int division is quadratic,
+    so n values take O(n log² n) time rather than n² gcds.
+
+    Zeros are left out of the product (it would be 0, making the result x
+    for every x) and get 0; negative values count as abs(x).
+    """
+    xs = [abs(x) for x in values if x]
+    if not xs:
+        return [0] * len(values)
+    with decimal.localcontext(_EXACT):
+        level = [decimal.Decimal(x) for x in xs]
+        tree = [level]
+        while len(level) > 1:
+            level = [
+                level[i] * level[i + 1] if i + 1 < len(level) else level[i]
+                for i in range(0, len(level), 2)
+            ]
+            tree.append(level)
+        rems = level
+        for level in reversed(tree[:-1]):
+            rems = [rems[i // 2] % (x * x) for i, x in enumerate(level)]
+    gs = iter([math.gcd(int(r) // x, x) for r, x in zip(rems, xs)])
+    return [next(gs) if x else 0 for x in values]
+
+
+# Indices listed on stderr by gcd --batch; the output has them all.
+_SHARED_SHOWN = 100
 
 
 def run_gcd(args):
@@ -1073,19 +3130,100 @@ def run_gcd(args):
 
     Reads all lines, then outputs gcd(data[i], data[j]) for i != j pairs.
     Output: 64-char lowercase hex per pair.
+
+    With --batch, outputs gcd(x, product of all the other values) for each
+    value x instead, one per input line and in input order (see batch_gcd),
+    and lists the indices of the values with a nontrivial one on stderr.
     """
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
-        try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
+    if not args.batch:
+        pairwise(args, read_values(args), lambda a, b: (math.gcd(a, b),), commutative=True)
+        return
+    for name, on in (
+        ("--left/--right", args.left is not None or args.right is not None),
+        ("--sample-pairs", args.sample_pairs is not None),
+        ("--incremental", args.incremental),
+        ("--mem-limit", args.mem_limit),
+        ("--jobs", args.jobs > 1),
+        ("--top", args.top is not None),
+    ):
+        if on:
+            sys.exit(f"generators.py: --batch and {name} cannot be combined")
+    out = args.out
+    values = list(itertools.islice(read_values(args), args.max_inputs))
+    gcds = batch_gcd(values)
+    for g in gcds:
+        out.value(g)
+    shared = [str(i) for i, g in enumerate(gcds) if g > 1]
+    zeros = values.count(0)
+    if shared:
+        more = f" ... ({len(shared) - _SHARED_SHOWN} more)" if len(shared) > _SHARED_SHOWN else ""
+        print(
+            f"{args.generator}: {len(shared)} of {len(values)} value(s) share a factor "
+            f"with another, at indices: {' '.join(shared[:_SHARED_SHOWN])}{more}",
+            file=sys.stderr,
+        )
+    if zeros:
+        print(
+            f"{args.generator}: {zeros} zero value(s) left out of the product",
+            file=sys.stderr,
+        )
 
-    for i in range(len(data) - 1):
-        for j in range(len(data) - 1):
-            if i != j:
-                print(hexify(math.gcd(data[i], data[j])))
+
+# Remainders wider than this take Lehmer steps in xgcd(): below it, plain
+# Euclid on Python ints is faster than the extra bookkeeping.
+_LEHMER_BITS = 1024
+# Leading bits per Lehmer step: one CPython digit, so the single-precision
+# quotients stay cheap.
+_LEHMER_DIGIT = 30
+
+
+def xgcd(a, b):
+    """Return (g, x, y) with a*x + b*y == g, the gcd of a and b.
+
+    Iterative, so deep quotient sequences cannot overflow the stack, and gives
+    the same x and y as the textbook recursive version.  While the remainders
+    are wide it takes Lehmer steps: quotients are found from the leading
+    _LEHMER_DIGIT bits and applied to the full-size numbers in one go, so that
+    work grows with the number of steps taken together rather than with each
+    quotient.  Lehmer's test only accepts quotients that full-precision Euclid
+    would give too, so x and y do not change.
+    """
+    r0, r1, s0, s1, t0, t1 = a, b, 1, 0, 0, 1
+    if a >= 0 and b >= 0:
+        if r0 < r1:
+            r0, r1, s0, s1, t0, t1 = r1, r0, 0, 1, 1, 0
+        while r1 >> _LEHMER_BITS:
+            shift = r0.bit_length() - _LEHMER_DIGIT
+            x = r0 >> shift
+            y = r1 >> shift
+            A, B, C, D = 1, 0, 0, 1
+            while y + C and y + D:
+                q = (x + A) // (y + C)
+                if q != (x + B) // (y + D):
+                    break
+                A, C = C, A - q * C
+                B, D = D, B - q * D
+                x, y = y, x - q * y
+            if B:
+                r0, r1 = A * r0 + B * r1, C * r0 + D * r1
+                s0, s1 = A * s0 + B * s1, C * s0 + D * s1
+                t0, t1 = A * t0 + B * t1, C * t0 + D * t1
+            else:
+                q = r0 // r1
+                r0, r1 = r1, r0 - q * r1
+                s0, s1 = s1, s0 - q * s1
+                t0, t1 = t1, t0 - q * t1
+    while r1:
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        s0, s1 = s1, s0 - q * s1
+        t0, t1 = t1, t0 - q * t1
+    return r0, s0, t0
+
+
+def xgcd_row(a, bs):
+    """Return [xgcd(a, b) for b in bs], for one a against a block of b values."""
+    return [xgcd(a, b) for b in bs]
 
 
 def run_xgcd(args):
@@ -1096,26 +3234,173 @@ def run_xgcd(args):
     Note: x and y can be negative; they are output as signed decimal integers
     alongside g in hex to preserve full information.
     """
+    out = args.out
 
-    def xgcd(a, b):
-        if b == 0:
-            return a, 1, 0
-        g, x1, y1 = xgcd(b, a % b)
-        return g, y1, x1 - (a // b) * y1
+    def row(a, b):
+        g, x, y = xgcd(a, b)
+        return (f"{hexify(g)} {x} {y}",)
 
-    data = []
-    for line in sys.stdin:
-        line = line.replace("0x", "").replace("L", "").replace("\n", "")
+    # The pairwise engine hands whole rows to row.row where it can.
+    row.row = lambda a, bs: [(f"{hexify(g)} {x} {y}",) for g, x, y in xgcd_row(a, bs)]
+
+    pairwise(args, read_values(args), row, emit=out.line)
+
+
+# Decimal digits per int() call: below the int_max_str_digits default (4300)
+# of Python 3.11+, and short enough that int()'s quadratic cost stays small.
+_DEC_CHUNK = 4000
+_HEXDIGITS = b"0123456789abcdefABCDEF"
+_SPACE = b" \t\r\v\f"
+
+
+class ModReducer:
+    """Compute x mod n for one decimal or hex number fed in as byte pieces.
+
+    x mod n is updated piece by piece (acc * base**len + int(piece)), with
+    decimal digits parsed at most _DEC_CHUNK at a time.  Work is linear in the
+    number of digits, there is no digit limit, and a number may arrive in
+    as many pieces as needed.  Both readings of the digits are kept until
+    the end: a 0x prefix means hex; otherwise the number is decimal if every
+    digit is, else hex.  The rest of the grammar is int()'s, as used for
+    short lines by _reduce_line(): an optional sign, single underscores
+    between digits (or after the prefix), and whitespace only around the
+    number.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.head = b""  # first bytes, held until the sign and prefix are known
+        self.started = False
+        self.negative = False
+        self.digits = 0
+        self.dec = self.hex = 0
+        self.dec_ok = self.hex_ok = True
+        self.prefixed = False
+        self.under = False  # the last byte fed was "_"
+        self.closed = False  # whitespace followed the number
+        self.bad = False
+        self._dec_step = pow(10, _DEC_CHUNK, n)
+
+    @property
+    def empty(self):
+        return not self.started and not self.head and not self.bad
+
+    def feed(self, piece):
+        if self.closed:
+            if piece.strip(_SPACE):
+                self.bad = True
+            return
+        if self.empty:
+            piece = piece.lstrip(_SPACE)
+            if not piece:
+                return
+        body = piece.rstrip(_SPACE)
+        if len(body) < len(piece):
+            self.closed = True
+            piece = body
+        if len(piece.translate(None, _SPACE)) < len(piece):
+            self.bad = True
+            return
+        if not self.started:
+            self.head += piece
+            if len(self.head) < 3:  # room for "-0x"
+                return
+            piece, self.head = self._start(self.head), b""
+        self._digits(piece)
+
+    def finish(self):
+        """Return x mod n, or None if the input was not a number."""
+        if not self.started:
+            self._digits(self._start(self.head))
+        if not self.digits or self.under or self.bad:
+            return None
+        if self.dec_ok:
+            x = self.dec
+        elif self.hex_ok:
+            x = self.hex
+        else:
+            return None
+        return (-x) % self.n if self.negative else x
+
+    def _start(self, s):
+        self.started = True
+        if s[:1] in (b"+", b"-"):
+            self.negative = s[:1] == b"-"
+            s = s[1:]
+        if s[:2] in (b"0x", b"0X"):
+            self.dec_ok = False
+            self.prefixed = True
+            s = s[2:]
+        return s
+
+    def _digits(self, s):
+        if not s:
+            return
+        if b"_" in s:
+            # Only between digits, or straight after the prefix.
+            if s[:1] == b"_" and (self.under or not (self.digits or self.prefixed)):
+                self.bad = True
+            if b"__" in s:
+                self.bad = True
+            self.under = s[-1:] == b"_"
+            s = s.replace(b"_", b"")
+            if not s:
+                return
+        else:
+            self.under = False
+        n = self.n
+        self.digits += len(s)
+        if self.hex_ok:
+            if s.translate(None, _HEXDIGITS):
+                self.hex_ok = False
+            else:
+                self.hex = (self.hex * pow(16, len(s), n) + int(s, 16)) % n
+        if self.dec_ok:
+            if not s.isdigit():
+                self.dec_ok = False
+                return
+            acc = self.dec
+            for i in range(0, len(s), _DEC_CHUNK):
+                c = s[i : i + _DEC_CHUNK]
+                step = self._dec_step if len(c) == _DEC_CHUNK else pow(10, len(c), n)
+                acc = (acc * step + int(c)) % n
+            self.dec = acc
+
+
+def _reduce_line(s, n):
+    """Return the decimal or hex string s reduced mod n, or None if it is neither."""
+    if len(s) <= _DEC_CHUNK:
         try:
-            data.append(int(line, 16))
-        except Exception:
-            pass
+            if s.startswith("0x") or s.startswith("0X"):
+                return int(s, 16) % n
+            try:
+                return int(s, 10) % n
+            except ValueError:
+                return int(s, 16) % n
+        except ValueError:
+            return None
+    r = ModReducer(n)
+    r.feed(s.encode("utf-8", "surrogateescape"))
+    return r.finish()
 
-    for i in range(len(data) - 1):
-        for j in range(len(data) - 1):
-            if i != j:
-                g, x, y = xgcd(data[i], data[j])
-                print(f"{hexify(g)} {x} {y}")
+
+def _reduce_stream(read, n):
+    """Yield x mod n (None if malformed) for each non-blank line from read(size).
+
+    Lines are never held in memory whole, so a number may be far larger than
+    the read buffer.
+    """
+    r = ModReducer(n)
+    while chunk := read(READ_CHUNK):
+        pieces = chunk.split(b"\n")
+        for piece in pieces[:-1]:
+            r.feed(piece)
+            if not r.empty:
+                yield r.finish()
+            r = ModReducer(n)
+        r.feed(pieces[-1])
+    if not r.empty:
+        yield r.finish()
 
 
 def run_mod_reduce(args):
@@ -1123,25 +3408,118 @@ def run_mod_reduce(args):
 
     Accepts:
       - Lines starting with '0x' or '0X' as hexadecimal
-      - Plain decimal integer strings
+      - Plain decimal integer strings, of any length
       - Bare hex strings (64 or fewer hex characters without '0x' prefix)
+    Long numbers are reduced mod N while they are parsed (see ModReducer);
+    with --stream a number need not fit in memory as one line.  Lines that
+    are neither decimal nor hex are counted and reported on stderr.
     Output: 64-char lowercase hex.
     """
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            if line.startswith("0x") or line.startswith("0X"):
-                x = int(line, 16)
+    out = args.out
+    rejected = 0
+    with _text_input(args) as read:
+        if args.stream:
+            results = _reduce_stream(read, N)
+        else:
+            results = (
+                _reduce_line(line, N) for line in map(str.strip, _split_lines(read)) if line
+            )
+        for x in results:
+            if x is None:
+                rejected += 1
             else:
-                try:
-                    x = int(line, 10)
-                except ValueError:
-                    x = int(line, 16)
-            print(hexify(x % N))
-        except Exception:
-            pass
+                out.value(x)
+    if rejected:
+        print(
+            f"{args.generator}: rejected {rejected} malformed input line(s)",
+            file=sys.stderr,
+        )
+
+
+def run_dedup(args):
+    """Read hex lines from stdin; print each value the first time it is seen.
+
+    The dedup stage as a generator of its own: it is the identity with
+    --dedup always on, so the --dedup-* options size the filter and
+    --dedup-state carries it from run to run.
+    Output: 64-char lowercase hex.
+    """
+    out = args.out
+    for x in read_values(args):
+        out.value(x)
+
+
+_SORT_VALUE_BYTES = 100  # memory per value held by sort-unique: int plus list slot
+_MERGE_FANIN = 64  # most runs merged at once; more are merged in passes
+
+
+def run_sort_unique(args):
+    """Read hex lines from stdin; print the distinct values in ascending order.
+
+    An external merge sort on 32-byte records: values are read in runs of
+    --mem-limit bytes' worth, and each run is sorted, cut to its distinct
+    values and spilled to a scratch file (in TMPDIR) as 32-byte big-endian
+    records.  The runs are then merged with a heap, comparing the records
+    as bytes (which orders them as numbers) and dropping repeats, up to
+    _MERGE_FANIN runs at a time.  Input that fits in one run is never
+    spilled.
+    Output: 64-char lowercase hex.
+    """
+    out = args.out
+    limit = max(1, args.mem_limit // _SORT_VALUE_BYTES)
+    runs = []
+    run = []
+    try:
+        for batch in read_batches(args):
+            run += batch
+            if len(run) >= limit:
+                runs.append(_sorted_run(run))
+                run = []
+        if not runs:
+            run.sort()
+            run = [x for x, _ in itertools.groupby(run)]
+            if run and (run[0] < 0 or run[-1] >> 256):
+                bad = run[0] if run[0] < 0 else run[-1]
+                sys.exit(f"generators.py: value {bad:#x} does not fit in a 32-byte record")
+            for x in run:
+                out.value(x)
+            return
+        if run:
+            runs.append(_sorted_run(run))
+        del run
+        chunk = max(RECORD_SIZE, args.mem_limit // (2 * _MERGE_FANIN) // RECORD_SIZE * RECORD_SIZE)
+        while len(runs) > _MERGE_FANIN:
+            merged = tempfile.TemporaryFile(prefix="sort-unique-", suffix=".u256")
+            group = runs[:_MERGE_FANIN]
+            merged.writelines(_merged_records(group, chunk))
+            for fp in group:
+                fp.close()
+            runs = runs[_MERGE_FANIN:] + [merged]
+        for rec in _merged_records(runs, chunk):
+            out.value(int.from_bytes(rec, "big"))
+    finally:
+        for fp in runs:
+            fp.close()
+
+
+def _sorted_run(run):
+    """Sort run, drop its repeats and spill it; return the scratch file."""
+    fp = tempfile.TemporaryFile(prefix="sort-unique-", suffix=".u256")
+    run.sort()
+    _spill((x for x, _ in itertools.groupby(run)), fp)
+    return fp
+
+
+def _merged_records(runs, chunk):
+    """Yield the distinct records of the sorted run files, in order."""
+    def records(fp):
+        fp.seek(0)
+        while data := fp.read(chunk):
+            for i in range(0, len(data), RECORD_SIZE):
+                yield data[i : i + RECORD_SIZE]
+
+    for rec, _ in itertools.groupby(heapq.merge(*map(records, runs))):
+        yield rec
 
 
 # ── Registry ──────────────────────────────────────────────────────────────────
@@ -1365,6 +3743,14 @@ GENERATORS = {
         run_mod_reduce,
         "Read decimal or hex lines; output x mod N as 64-char hex",
     ),
+    "dedup": (
+        run_dedup,
+        "Read hex lines; drop values already seen (Bloom filter, see --dedup-*)",
+    ),
+    "sort-unique": (
+        run_sort_unique,
+        "Read hex lines; distinct values in ascending order (external merge sort)",
+    ),
 }
 
 # ── Deprecated aliases ────────────────────────────────────────────────────────
@@ -1425,7 +3811,244 @@ for _old, _new in ALIASES.items():
     _REVERSE_ALIASES.setdefault(_new, []).append(_old)
 
 
+def _common_options():
+    """Options accepted by every generator (added via argparse parents=)."""
+    common = argparse.ArgumentParser(add_help=False)
+    group = common.add_argument_group("output options")
+    group.add_argument(
+        "--buffer-size",
+        type=parse_size,
+        default=None,
+        metavar="BYTES",
+        help="Output buffer size, e.g. 64K or 4M (default: 1M; line-by-line on a tty)",
+    )
+    group.add_argument(
+        "--out-format",
+        choices=("hex", "raw"),
+        default="hex",
+        help="Write values as 64-char hex lines or 32-byte big-endian records (default: hex)",
+    )
+    group.add_argument(
+        "--compress",
+        choices=sorted(COMPRESSORS),
+        default=None,
+        help="Compress output on a background thread",
+    )
+    group.add_argument(
+        "--compress-level",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Compression level (gzip 0-9, default 6; bz2 1-9, default 9; lzma 0-9, default 6)",
+    )
+    group.add_argument(
+        "--shard-out",
+        default=None,
+        metavar="DIR",
+        help="Write output to DIR/part-NNNNN files instead of stdout",
+    )
+    group.add_argument(
+        "--shards",
+        type=int,
+        default=4,
+        metavar="K",
+        help="Number of shard files for --shard-out (default: 4)",
+    )
+    group.add_argument(
+        "--shard-by",
+        choices=("hash", "roundrobin"),
+        default="hash",
+        help="hash sends equal outputs to the same shard; roundrobin deals them in turn (default: hash)",
+    )
+    group.add_argument(
+        "--where",
+        type=where_predicate,
+        default=None,
+        metavar="EXPR",
+        help="Write only values for which EXPR is true; EXPR sees the value as y "
+        "(and the pair as a, b in pairwise generators), e.g. 'popcount(y) == 128'",
+    )
+    group.add_argument(
+        "--dedup",
+        action="store_true",
+        default=False,
+        help="Drop outputs already written, using a Bloom filter (a false positive drops a new value)",
+    )
+    group.add_argument(
+        "--dedup-fp-rate",
+        type=fp_rate,
+        default=1e-6,
+        metavar="P",
+        help="Target false-positive rate of the --dedup filter (default: 1e-6)",
+    )
+    group.add_argument(
+        "--dedup-mem",
+        type=parse_size,
+        default=64 << 20,
+        metavar="BYTES",
+        help="Size of the --dedup filter; at the default rate 64M holds about 19M values (default: 64M)",
+    )
+    group.add_argument(
+        "--dedup-state",
+        default=None,
+        metavar="FILE",
+        help="Load the --dedup filter from FILE if it exists and save it there at exit, "
+        "so later runs also drop values written by this one",
+    )
+    group.add_argument(
+        "--io-threads",
+        action="store_true",
+        default=False,
+        help="Read stdin ahead and write stdout on background threads",
+    )
+    group.add_argument(
+        "--shm-out",
+        default=None,
+        metavar="NAME",
+        help="Send raw records to a shared-memory ring NAME read by another generator's --shm-in",
+    )
+    group.add_argument(
+        "--shm-slots",
+        type=int,
+        default=1 << 16,
+        metavar="N",
+        help="Capacity of the --shm-out ring in 32-byte records (default: 65536)",
+    )
+    group = common.add_argument_group("input options")
+    group.add_argument(
+        "--input",
+        default=None,
+        metavar="PATH",
+        help="Read values from PATH through a memory map instead of stdin",
+    )
+    group.add_argument(
+        "--cache-dir",
+        default=None,
+        metavar="DIR",
+        help="Keep parsed hex --input files in DIR as .u256 record caches and reuse them",
+    )
+    group.add_argument(
+        "--shm-in",
+        default=None,
+        metavar="NAME",
+        help="Read raw records from the shared-memory ring NAME written by --shm-out",
+    )
+    group.add_argument(
+        "--in-format",
+        choices=("hex", "raw"),
+        default="hex",
+        help="Read values as hex lines or 32-byte big-endian records (default: hex)",
+    )
+    return common
+
+
+# Generators that run through pairwise() and take _pairwise_options().
+PAIRWISE = {
+    "abs-diff", "bit-and", "bit-or", "bitwise-ops", "gcd", "mod-add", "mod-div",
+    "mod-mul", "mod-sub", "xgcd", "xor-pairs",
+}
+
+
+def _pairwise_options():
+    """Options accepted by the PAIRWISE generators."""
+    pairwise = argparse.ArgumentParser(add_help=False)
+    group = pairwise.add_argument_group("pairwise options")
+    group.add_argument(
+        "--unordered",
+        action="store_true",
+        default=False,
+        help="Write each pair's result once instead of for both (i, j) and (j, i) "
+        "(commutative generators; ignored by mod-div and xgcd)",
+    )
+    group.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="K",
+        help="Split the pairs over K worker processes (default: 1)",
+    )
+    group.add_argument(
+        "--ordered",
+        action="store_true",
+        default=False,
+        help="With --jobs, write results in row order instead of as blocks finish",
+    )
+    group.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Pair each value with all earlier ones as soon as it arrives",
+    )
+    group.add_argument(
+        "--max-inputs",
+        type=int,
+        default=None,
+        metavar="M",
+        help="Read at most M input values (e.g. from an endless generator)",
+    )
+    group.add_argument(
+        "--left",
+        default=None,
+        metavar="FILE",
+        help="Cross join: pair each value of FILE (- for stdin) with each --right value",
+    )
+    group.add_argument(
+        "--right",
+        default=None,
+        metavar="FILE",
+        help="Right-hand input of the --left cross join (- for stdin)",
+    )
+    group.add_argument(
+        "--sample-pairs",
+        type=non_negative_int,
+        default=None,
+        metavar="M",
+        help="Run only M pairs drawn uniformly at random from the pair space",
+    )
+    group.add_argument(
+        "--seed",
+        default=None,
+        metavar="S",
+        help="Random seed for --sample-pairs (default: unseeded)",
+    )
+    group.add_argument(
+        "--with-replacement",
+        action="store_true",
+        default=False,
+        help="Let --sample-pairs draw the same pair more than once",
+    )
+    group.add_argument(
+        "--top",
+        type=int,
+        default=None,
+        metavar="K",
+        help="Write only the K smallest (or largest, see --order) results, sorted",
+    )
+    group.add_argument(
+        "--order",
+        choices=("min", "max"),
+        default="min",
+        help="Whether --top keeps the smallest or the largest results (default: min)",
+    )
+    group.add_argument(
+        "--top-indices",
+        action="store_true",
+        default=False,
+        help="With --top, write \"y i j\" lines naming the input pair of each result",
+    )
+    group.add_argument(
+        "--mem-limit",
+        type=parse_size,
+        default=None,
+        metavar="BYTES",
+        help="Spill the input to a scratch file and pair it in tiles that fit in BYTES, e.g. 2G",
+    )
+    return pairwise
+
+
 def _build_parser():
+    common = _common_options()
+    pairwise = _pairwise_options()
     parser = argparse.ArgumentParser(
         prog="generators.py",
         description="256btests unified generator/test CLI",
@@ -1452,7 +4075,9 @@ def _build_parser():
     # Generators that require a positional 'seed' argument
     for name in ("rand-seeded", "rand-offset", "rand-bytes"):
         old_aliases = _REVERSE_ALIASES.get(name, [])
-        sp = subparsers.add_parser(name, aliases=old_aliases, help=GENERATORS[name][1])
+        sp = subparsers.add_parser(
+            name, aliases=old_aliases, help=GENERATORS[name][1], parents=[common]
+        )
         sp.add_argument("seed", help="Random seed value")
         sp.set_defaults(func=GENERATORS[name][0])
 
@@ -1461,6 +4086,7 @@ def _build_parser():
         "entropy-scan",
         aliases=_REVERSE_ALIASES.get("entropy-scan", []),
         help=GENERATORS["entropy-scan"][1],
+        parents=[common],
     )
     sp.add_argument("filename", help="Path to the binary file to scan")
     sp.add_argument("start", type=int, help="Start byte offset in the file")
@@ -1476,22 +4102,74 @@ def _build_parser():
 
     # shl / shr — accept optional --shift argument
     for name in ("shl", "shr"):
-        sp = subparsers.add_parser(name, help=GENERATORS[name][1])
+        sp = subparsers.add_parser(name, help=GENERATORS[name][1], parents=[common])
         sp.add_argument(
             "--shift",
-            type=int,
+            type=shift_count,
             default=1,
             metavar="k",
             help="Number of bits to shift (0-255, default: 1)",
         )
         sp.set_defaults(func=GENERATORS[name][0])
 
+    # mod-reduce — optional --stream for numbers longer than a line buffer
+    sp = subparsers.add_parser(
+        "mod-reduce", help=GENERATORS["mod-reduce"][1], parents=[common]
+    )
+    sp.add_argument(
+        "--stream",
+        action="store_true",
+        default=False,
+        help="Reduce numbers as they are read, without holding whole lines in memory",
+    )
+    sp.set_defaults(func=run_mod_reduce)
+
+    # gcd — pairwise, plus --batch for the product-tree batch GCD
+    sp = subparsers.add_parser(
+        "gcd",
+        aliases=_REVERSE_ALIASES.get("gcd", []),
+        help=GENERATORS["gcd"][1],
+        parents=[common, pairwise],
+    )
+    sp.add_argument(
+        "--batch",
+        action="store_true",
+        default=False,
+        help="Write gcd(x, product of all other values) once per value instead of "
+        "a gcd per pair (product/remainder trees, quasi-linear time)",
+    )
+    sp.set_defaults(func=run_gcd)
+
+    # dedup — the --dedup stage on its own, so --dedup is implied (see open_sink)
+    sp = subparsers.add_parser("dedup", help=GENERATORS["dedup"][1], parents=[common])
+    sp.set_defaults(func=run_dedup)
+
+    # sort-unique — --mem-limit sets the size of the in-memory runs
+    sp = subparsers.add_parser(
+        "sort-unique", help=GENERATORS["sort-unique"][1], parents=[common]
+    )
+    sp.add_argument(
+        "--mem-limit",
+        type=parse_size,
+        default=256 << 20,
+        metavar="BYTES",
+        help="Memory for sorting; larger inputs are sorted in runs of this size, "
+        "spilled to $TMPDIR and merged (default: 256M)",
+    )
+    sp.set_defaults(func=run_sort_unique)
+
     # All remaining generators — no special arguments
-    _special = {"rand-seeded", "rand-offset", "rand-bytes", "entropy-scan", "shl", "shr"}
+    _special = {
+        "rand-seeded", "rand-offset", "rand-bytes", "entropy-scan", "shl", "shr",
+        "mod-reduce", "gcd", "dedup", "sort-unique",
+    }
     for name, (func, desc) in GENERATORS.items():
         if name not in _special:
             old_aliases = _REVERSE_ALIASES.get(name, [])
-            sp = subparsers.add_parser(name, aliases=old_aliases, help=desc)
+            parents = [common, pairwise] if name in PAIRWISE else [common]
+            sp = subparsers.add_parser(
+                name, aliases=old_aliases, help=desc, parents=parents
+            )
             sp.set_defaults(func=func)
 
     return parser
@@ -1515,7 +4193,17 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    args.func(args)
+    args.out = open_sink(args)
+    try:
+        try:
+            args.func(args)
+        finally:
+            args.out.close()
+    except BrokenPipeError:
+        # Downstream closed early (e.g. `| head`); silence the flush at exit.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
 
 
 if __name__ == "__main__":